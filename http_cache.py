@@ -0,0 +1,122 @@
+"""
+http_cache.py - Small on-disk TTL cache for GitHub REST responses
+
+Repeated story tracking within a few minutes is served from a local
+SQLite file instead of re-hitting the GitHub API. Expired entries keep
+their ETag / Last-Modified validators so they can be revalidated with a
+conditional request (a 304 costs no rate limit and carries no body).
+"""
+import os
+import re
+import json
+import time
+import sqlite3
+from contextlib import closing
+from typing import Any, Dict, Optional
+
+DEFAULT_CACHE_PATH = os.path.join(".cache", "github.sqlite")
+
+_MAX_AGE_RE = re.compile(r"max-age=(\d+)")
+
+
+def max_age(cache_control: Optional[str]) -> Optional[int]:
+    """Seconds from a Cache-Control header's max-age directive, if any"""
+    match = _MAX_AGE_RE.search(cache_control or "")
+    return int(match.group(1)) if match else None
+
+
+class ResponseCache:
+    """TTL'd response store keyed by (namespace, method, endpoint, sorted params)"""
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, expire_after: int = 300,
+                 allowable_methods: tuple = ("GET",)):
+        self.path = path
+        self.expire_after = expire_after
+        self.allowable_methods = tuple(m.upper() for m in allowable_methods)
+        try:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, body TEXT NOT NULL, expires_at REAL NOT NULL, "
+                "etag TEXT, last_modified TEXT)"
+            )
+            # Caches created before validators were stored lack the two columns
+            columns = {row[1] for row in self._execute("PRAGMA table_info(responses)")}
+            for column in ("etag", "last_modified"):
+                if column not in columns:
+                    self._execute(f"ALTER TABLE responses ADD COLUMN {column} TEXT")
+        except (OSError, sqlite3.Error) as e:
+            print(f"⚠️ HTTP cache disabled: {e}")
+            self.path = None
+
+    def _execute(self, sql: str, params: tuple = ()) -> list:
+        with closing(sqlite3.connect(self.path, timeout=5)) as conn:
+            rows = conn.execute(sql, params).fetchall()
+            conn.commit()
+            return rows
+
+    def make_key(self, method: str, url: str, params: Optional[Dict[str, Any]] = None,
+                 namespace: str = "") -> Optional[str]:
+        """Build a cache key, or None if the method is not cacheable"""
+        method = method.upper()
+        if method not in self.allowable_methods:
+            return None
+        return json.dumps([namespace, method, url, sorted((params or {}).items())], default=str)
+
+    def get(self, key: Optional[str]) -> Optional[Any]:
+        """Return the cached body if present and not expired"""
+        entry = self.get_entry(key)
+        return entry["body"] if entry and entry["fresh"] else None
+
+    def get_entry(self, key: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Return the cached entry (body, fresh, etag, last_modified), expired or not"""
+        if not key or not self.path:
+            return None
+        try:
+            rows = self._execute(
+                "SELECT body, expires_at, etag, last_modified FROM responses WHERE key = ?", (key,)
+            )
+        except sqlite3.Error as e:
+            print(f"⚠️ HTTP cache read failed: {e}")
+            return None
+        if not rows:
+            return None
+        body, expires_at, etag, last_modified = rows[0]
+        return {
+            "body": json.loads(body),
+            "fresh": expires_at > time.time(),
+            "etag": etag,
+            "last_modified": last_modified
+        }
+
+    def set(self, key: Optional[str], body: Any, expire_after: Optional[int] = None,
+            etag: Optional[str] = None, last_modified: Optional[str] = None) -> None:
+        if not key or not self.path:
+            return
+        ttl = self.expire_after if expire_after is None else expire_after
+        try:
+            self._execute(
+                "INSERT OR REPLACE INTO responses (key, body, expires_at, etag, last_modified) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, json.dumps(body), time.time() + ttl, etag, last_modified)
+            )
+        except sqlite3.Error as e:
+            print(f"⚠️ HTTP cache write failed: {e}")
+
+    def touch(self, key: Optional[str], expire_after: Optional[int] = None) -> None:
+        """Mark an entry fresh again after a 304 Not Modified"""
+        if not key or not self.path:
+            return
+        ttl = self.expire_after if expire_after is None else expire_after
+        try:
+            self._execute("UPDATE responses SET expires_at = ? WHERE key = ?", (time.time() + ttl, key))
+        except sqlite3.Error as e:
+            print(f"⚠️ HTTP cache write failed: {e}")
+
+    def clear(self) -> None:
+        if not self.path:
+            return
+        try:
+            self._execute("DELETE FROM responses")
+        except sqlite3.Error as e:
+            print(f"⚠️ HTTP cache clear failed: {e}")
@@ -1,9 +1,373 @@
 import streamlit as st
 import asyncio
 import os
-import json
+import re
+import time
+import threading
+import orjson
+from dotenv import load_dotenv
+from functools import lru_cache
 from jira_github_tracker_backend import JiraGitHubTracker, format_story_status
 
+try:
+    from rapidfuzz import process, fuzz
+except ImportError:  # Optional: fall back to plain substring matching
+    process = fuzz = None
+
+# ==================================================
+# GitHub User Mapping
+# ==================================================
+# Jira email -> GitHub username, parsed once at import. jira_ui3 imports this
+# module before it loads .env, so load it here first (it never overrides).
+load_dotenv()
+try:
+    _USER_MAPPING = orjson.loads(os.getenv("GITHUB_USER_MAPPING", "{}"))
+except orjson.JSONDecodeError as e:
+    print(f"⚠️ Bad GITHUB_USER_MAPPING, ignoring it: {e}")
+    _USER_MAPPING = {}
+if not isinstance(_USER_MAPPING, dict):
+    print("⚠️ GITHUB_USER_MAPPING must be a JSON object, ignoring it")
+    _USER_MAPPING = {}
+
+# ==================================================
+# Async Bridge
+# ==================================================
+
+def run_async(coro):
+    """
+    Run a coroutine on the app's persistent event loop.
+    jira_ui3 imports this module during its own startup, so importing it
+    back at module level would be circular; resolve it at call time instead.
+    """
+    from jira_ui3 import run_async as _run_async
+    return _run_async(coro)
+
+@lru_cache(maxsize=1)
+def _get_model():
+    """
+    The Gemini model jira_ui3 configures at import; resolved lazily for the
+    same reason as run_async, then reused for every click
+    """
+    import jira_ui3
+    return getattr(jira_ui3, "model", None)
+
+def submit_async(coro):
+    """
+    Schedule a coroutine on the persistent loop without waiting for it;
+    returns a concurrent.futures.Future
+    """
+    from jira_ui3 import get_loop
+    return asyncio.run_coroutine_threadsafe(coro, get_loop())
+
+# ==================================================
+# Cached Jira / GitHub Lookups
+# ==================================================
+
+@st.cache_data(ttl=600, show_spinner=False)
+def _get_github_repos(token_fingerprint: str) -> list:
+    """
+    List repositories visible to the GitHub token, shared across reruns and sessions.
+    Failures raise so that they are not cached.
+    """
+    return run_async(_collect_repos(st.session_state.github))
+
+# Analyses (GitHub scan + Gemini validation) allowed to run at once across sessions
+MAX_CONCURRENT_ANALYSES = 4
+_ANALYSIS_SLOTS = threading.BoundedSemaphore(MAX_CONCURRENT_ANALYSES)
+
+def _single_flight(key: tuple, make_coro):
+    """
+    Run make_coro() on the session loop unless the same key is already in flight
+    (a double click or a rerun mid-analysis), in which case wait for that run
+    instead of starting a second one
+    """
+    inflight = st.session_state.setdefault("_inflight", {})
+    fut = inflight.get(key)
+    if fut is not None:
+        return fut.result()
+    with _ANALYSIS_SLOTS:
+        fut = inflight[key] = submit_async(make_coro())
+        try:
+            return fut.result()
+        finally:
+            inflight.pop(key, None)
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _analyze(story_key: str, repo_owner: str, repo_name: str, updated: str,
+             _tracker, _story=None) -> dict:
+    """
+    Track a story's commits and AI validation. Keyed on the story's Jira
+    `updated` timestamp (clients and the prefetched issue are unhashed), so
+    re-tracking an unchanged story within five minutes skips Jira, GitHub and Gemini.
+    Comments are loaded on demand by the results view.
+    """
+    return _single_flight(
+        (story_key, repo_owner, repo_name),
+        lambda: _tracker.track_story_commits(
+            story_key=story_key,
+            repo_owner=repo_owner,
+            repo_name=repo_name,
+            story=_story,
+            fetch_comments=False
+        )
+    )
+
+async def _collect_repos(github) -> list:
+    """
+    Drain the paginated repository listing; each page is fetched and parsed on its own
+    """
+    repos = []
+    async for page in github.iter_repositories():
+        repos.extend(page)
+    return repos
+
+@st.cache_resource(ttl=600, show_spinner=False)
+def _get_repo_index(token_fingerprint: str) -> tuple:
+    """
+    (positions, names_lc, repos): parallel tuples of lowercased names and repos,
+    plus a lowercase-name -> position map for exact lookups. A resource cache
+    returns the same objects on every click instead of unpickled copies, so
+    names are lowercased once per listing.
+    """
+    repos = tuple(_get_github_repos(token_fingerprint))
+    names_lc = tuple(r["name"].lower() for r in repos)
+    positions = {}
+    for i, name_lc in enumerate(names_lc):
+        positions.setdefault(name_lc, i)
+    return positions, names_lc, repos
+
+_EMPTY_REPO_INDEX = ({}, (), ())
+
+def _guess_repo(repo_index: tuple, project_key: str):
+    """
+    Pick the repository that most likely belongs to a Jira project.
+    
+    Exact and pattern checks are lookups in the lowercase-name map; then
+    the already-lowercased names are scored with rapidfuzz (when installed),
+    and a plain substring scan catches what that misses.
+    """
+    positions, names_lc, repos = repo_index
+    
+    # 1. Exact match or 'project-app' / 'jira-project'
+    for candidate in (project_key, f"{project_key}-app", f"jira-{project_key}"):
+        if candidate in positions:
+            return repos[positions[candidate]]
+    
+    # 2. Closest fuzzy match on the project key. Only the key is known here (no
+    # project name to add to the query), and WRatio scales a short key inside a
+    # name over 8x its length down to at most 60, so a miss is not final
+    if process is not None:
+        best = process.extractOne(project_key, names_lc, scorer=fuzz.WRatio, score_cutoff=80)
+        if best:
+            return repos[best[2]]
+    
+    # 3. Key contained in the name, e.g. 'ct' in 'ct-platform-backend-service'
+    for i, name_lc in enumerate(names_lc):
+        if project_key in name_lc:
+            return repos[i]
+    return None
+
+_EMAIL_TABLE = str.maketrans({".": "-"})
+
+def _gh_from_email(email: str) -> str:
+    """
+    Guess a GitHub username from an email: john.doe@company.com -> john-doe
+    """
+    return email.partition("@")[0].translate(_EMAIL_TABLE).lower()
+
+async def _prefetch(jira, github, story_key: str, need_issue: bool = True, need_auth: bool = True) -> list:
+    """
+    Fetch the issue and the GitHub user concurrently, each unless already known.
+    A failing slot comes back as its exception instead of cancelling the
+    other; a skipped slot comes back as None.
+    """
+    async def skipped():
+        return None
+    
+    return await asyncio.gather(
+        jira.call("get_issue", {"issue_key": story_key}) if need_issue else skipped(),
+        github.call("get_authenticated_user", {}) if need_auth else skipped(),
+        return_exceptions=True
+    )
+
+# Seconds a fetched story is reused by repeat Track clicks ("🔄 Refresh Story" drops it)
+STORY_TTL = 60
+
+def _cached_story(story_key: str):
+    hit = st.session_state.setdefault("_story_cache", {}).get(story_key)
+    if hit and time.monotonic() - hit[0] < STORY_TTL:
+        return hit[1]
+    return None
+
+def _remember_story(story_key: str, story_data: dict):
+    st.session_state.setdefault("_story_cache", {})[story_key] = (time.monotonic(), story_data)
+
+# ==================================================
+# Server Log Viewer
+# ==================================================
+
+SERVER_LOG_PATH = "jira_server_debug.log"
+LOG_TAIL_BYTES = 2048
+
+@st.cache_data(ttl=5, show_spinner=False)
+def _read_log_tail(path: str, mtime: float) -> str:
+    """
+    Read only the last LOG_TAIL_BYTES of a log file; keyed on mtime so an
+    unchanged log is not re-read when the viewer is toggled
+    """
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        f.seek(max(0, size - LOG_TAIL_BYTES))
+        return f.read().decode("utf-8", errors="replace")
+
+@st.fragment
+def _render_diagnostics(story_key: str):
+    """
+    Tool probe and log viewer; runs as a fragment so toggling the log or
+    clicking Clear does not rerun the whole tracker page
+    """
+    st.markdown("### 🛠️ Advanced Diagnostics")
+    if st.button("🔌 Test Jira Tool: get_issue_comments"):
+        with st.spinner(f"Testing tool for {story_key}..."):
+            try:
+                raw_res = run_async(st.session_state.jira.call("get_issue_comments", {"issue_key": story_key}))
+                st.write("**Raw Server Response:**")
+                st.json(raw_res)
+            except Exception as e:
+                st.error(f"Tool call failed: {e}")
+
+    st.markdown("### 📜 Server Logs")
+    if st.toggle("View Server Debug Log"):
+        try:
+            if os.path.exists(SERVER_LOG_PATH):
+                tail = _read_log_tail(SERVER_LOG_PATH, os.path.getmtime(SERVER_LOG_PATH))
+                st.text_area("Last 2 KB of jira_server_debug.log", value=tail, height=300)
+                if st.button("🗑️ Clear Log"):
+                    os.truncate(SERVER_LOG_PATH, 0)
+                    st.rerun(scope="fragment")
+            else:
+                st.info("Log file not found yet. It will be created when the server runs.")
+        except OSError as e:
+            st.error(f"Error reading log: {e}")
+
+# ==================================================
+# Results Display
+# ==================================================
+
+# Comments / commits rendered per "Show more" click
+RESULTS_PAGE_SIZE = 20
+
+def _page_size(state_key: str) -> int:
+    return st.session_state.setdefault(state_key, RESULTS_PAGE_SIZE)
+
+def _show_more_button(state_key: str, total: int):
+    shown = st.session_state[state_key]
+    if shown < total and st.button(f"Show more ({total - shown} remaining)", key=f"more_{state_key}"):
+        st.session_state[state_key] = shown + RESULTS_PAGE_SIZE
+        st.rerun(scope="fragment")
+
+# First word of the validator's "Matching:" answer -> heading color
+_MATCH_COLORS = {"yes": "green", "partial": "orange", "no": "red"}
+_FIRST_WORD_RE = re.compile(r"[a-z]+")
+
+def _match_color(matching: str) -> str:
+    # Tolerates "[Yes]", "**Partial**", "Yes - mostly" etc.
+    word = _FIRST_WORD_RE.search(matching.lower())
+    return _MATCH_COLORS.get(word.group(0) if word else "", "red")
+
+def _comment_markdown(comment: dict) -> str:
+    author = comment.get('author', 'Unknown')
+    date = comment.get('created', '').replace('T', ' ')[:16]
+    body = (comment.get('body') or '').replace("\n", "\n> ")
+    return f"**{author}** ({date}):\n\n> {body}"
+
+@st.fragment
+def _render_analysis(analysis: dict, story_key: str, assignee_name: str):
+    """
+    Render a tracking result. Being a fragment, "Show more" and
+    "Load Comments" clicks only rerun this block instead of the whole page.
+    """
+    # Comments are fetched on demand, unless the analysis already carries them
+    comm_res = st.session_state.get(f"comments_{story_key}")
+    if comm_res is None and analysis.get("comments_fetched", True):
+        comm_res = {"comments": analysis.get("comments", []), "error": analysis.get("comments_error")}
+    
+    if analysis.get("error"):
+        st.error(f"❌ {analysis['error']}")
+    else:
+        st.divider()
+        st.subheader(f"📊 Analysis Result: {story_key}")
+
+        # Metrics
+        m1, m2, m3, m4 = st.columns(4)
+        m1.metric("Commits", analysis.get('commit_count', 0))
+        m2.metric("Comments", len(comm_res["comments"]) if comm_res else "—")
+        m3.metric("Work Status", analysis.get('work_status', 'Unknown'))
+        m4.metric("Assignee", assignee_name)
+
+        # Validation Results (Gemini)
+        if analysis.get('validation'):
+            st.markdown("### ✅ AI Validation Report")
+            val = analysis['validation']
+
+            v_col1, v_col2 = st.columns([1, 4])
+            with v_col1:
+                 matching = val.get("matching", "Unknown").strip()
+                 color = _match_color(matching)
+                 st.markdown(f"<h4 style='color:{color};'>{matching}</h4>", unsafe_allow_html=True)
+                 st.caption("Matches Story?")
+
+            with v_col2:
+                 st.write(f"**Summary:** {val.get('work_summary', 'N/A')}")
+                 if val.get('confidence'):
+                      st.write(f"**Confidence:** {val['confidence']}")
+
+            if val.get('notes'):
+                 st.warning(f"**Notes:** {val['notes']}")
+        else:
+            st.markdown("### 🚫 AI Validation Skipped")
+            st.info("AI Validation requires commits to compare against acceptance criteria. No commits were detected regarding this story yet.")
+
+        # Commits List
+        commits = analysis.get('commits', [])
+        if commits:
+            with st.expander(f"📝 View Raw Commits ({len(commits)})"):
+                shown = _page_size(f"commits_shown_{story_key}")
+                # One markdown element per page instead of one per commit
+                st.markdown("\n\n".join(
+                    f"**{commit['date'][:10]}** | `{commit['sha'][:7]}`: {commit['message']}"
+                    for commit in commits[:shown]
+                ))
+                _show_more_button(f"commits_shown_{story_key}", len(commits))
+
+        # Jira Comments List (Lower section as requested)
+        st.divider()
+        st.subheader("💬 Jira Activity & Comments")
+        if comm_res is None:
+            if st.button("💬 Load Comments", key=f"load_comments_{story_key}"):
+                with st.spinner("Fetching comments from Jira..."):
+                    tracker = JiraGitHubTracker(
+                        jira_client=st.session_state.jira,
+                        github_client=st.session_state.github,
+                        gemini_model=_get_model()
+                    )
+                    st.session_state[f"comments_{story_key}"] = run_async(tracker.get_comments(story_key))
+                st.rerun(scope="fragment")
+            return
+        
+        comments = comm_res.get('comments', [])
+        if comments:
+            with st.expander(f"View Jira Comments ({len(comments)})", expanded=len(comments) <= RESULTS_PAGE_SIZE):
+                shown = _page_size(f"comments_shown_{story_key}")
+                # One markdown element per page instead of two per comment
+                st.markdown("\n\n".join(_comment_markdown(c) for c in comments[:shown]))
+                _show_more_button(f"comments_shown_{story_key}", len(comments))
+        elif comm_res.get('error'):
+            st.error(f"❌ Failed to fetch comments: {comm_res['error']}")
+            st.info("💡 **Possible cause:** Your Jira API Token might lack 'Browse Projects' or 'View Comments' permissions for this project.")
+        else:
+            st.info("ℹ️ No comments found in Jira for this story.")
+
 # ==================================================
 # Integration UI Module
 # ==================================================
@@ -66,38 +430,33 @@ GITHUB_USER_MAPPING={"john.doe@company.com": "johndoe", "jane@company.com": "jan
                 help="Override the automatically detected repository name"
             )
         
+        if st.session_state.get("github"):
+            col_refresh, col_clear = st.columns(2)
+            with col_refresh:
+                if st.button("🔄 Refresh repos"):
+                    _get_github_repos.clear()
+                    _get_repo_index.clear()
+            with col_clear:
+                if st.button("🗑 Clear GitHub cache"):
+                    st.session_state.github.clear_cache()
+                    st.session_state.pop("github_auth_user", None)
+                    _get_github_repos.clear()
+                    _get_repo_index.clear()
+                    _analyze.clear()
+                    st.success("GitHub cache cleared")
+        
         st.divider()
-        st.markdown("### 🛠️ Advanced Diagnostics")
-        if st.button("🔌 Test Jira Tool: get_issue_comments"):
-            import jira_ui3
-            from jira_ui3 import run_async
-            with st.spinner(f"Testing tool for {story_key}..."):
-                try:
-                    raw_res = run_async(st.session_state.jira.call("get_issue_comments", {"issue_key": story_key}))
-                    st.write("**Raw Server Response:**")
-                    st.json(raw_res)
-                except Exception as e:
-                    st.error(f"Tool call failed: {e}")
-
-        st.markdown("### 📜 Server Logs")
-        if st.toggle("View Server Debug Log"):
-            try:
-                if os.path.exists("jira_server_debug.log"):
-                    with open("jira_server_debug.log", "r", encoding="utf-8") as f:
-                        log_data = f.read()
-                        # Show last 2000 characters
-                        st.text_area("Last 2000 chars of jira_server_debug.log", value=log_data[-2000:], height=300)
-                        if st.button("🗑️ Clear Log"):
-                            with open("jira_server_debug.log", "w") as f:
-                                f.write("")
-                            st.rerun()
-                else:
-                    st.info("Log file not found yet. It will be created when the server runs.")
-            except Exception as e:
-                st.error(f"Error reading log: {e}")
+        _render_diagnostics(story_key)
     
     # 2. Track Button
-    if st.button("🔍 Track Story & Validate Commits"):
+    col_track, col_refresh_story = st.columns([3, 1])
+    with col_refresh_story:
+        if st.button("🔄 Refresh Story", help="Re-fetch the story from Jira on the next Track"):
+            st.session_state.get("_story_cache", {}).pop(story_key, None)
+    with col_track:
+        track_clicked = st.button("🔍 Track Story & Validate Commits")
+    
+    if track_clicked:
         if not story_key:
             st.error("Please enter a Jira story key")
             return
@@ -111,18 +470,39 @@ GITHUB_USER_MAPPING={"john.doe@company.com": "johndoe", "jane@company.com": "jan
             return
 
         with st.spinner(f"🔍 Analyzing {story_key}..."):
-            import jira_ui3
-            from jira_ui3 import run_async
-            
             try:
                 # Step 1: Pre-fetch story to get assignee and details
                 # This makes the UI responsive and allows us to calculate repo params proactively
+                # Issue and GitHub user go out together; the repo listing
+                # (usually a cache hit) runs on the same loop while they are in flight
                 st.write("📡 Fetching story details from Jira...")
-                story_data = run_async(st.session_state.jira.call("get_issue", {"issue_key": story_key}))
+                # An explicit owner makes the auth-user fallback moot, and an explicit
+                # owner + repo makes repo discovery moot; skip those calls entirely
+                auth_user = st.session_state.get("github_auth_user")
+                cached_story = _cached_story(story_key)
+                pending = submit_async(_prefetch(
+                    st.session_state.jira, st.session_state.github, story_key,
+                    need_issue=cached_story is None,
+                    need_auth=auth_user is None and not default_owner
+                ))
+                repos_error, repo_index = None, _EMPTY_REPO_INDEX
+                if not (default_owner and default_name):
+                    try:
+                        repo_index = _get_repo_index(st.session_state.github.fingerprint)
+                    except RuntimeError as e:
+                        repos_error = e
+                story_data, auth_res = pending.result()
+                
+                if isinstance(story_data, Exception):
+                    raise story_data
+                if cached_story is not None:
+                    story_data = cached_story
                 
                 if isinstance(story_data, dict) and story_data.get("isError"):
                     st.error(f"❌ Failed to fetch story: {story_data.get('error')}")
                     return
+                if cached_story is None and isinstance(story_data, dict):
+                    _remember_story(story_key, story_data)
                 
                 # Extract assignee
                 fields = story_data.get("fields", {})
@@ -137,23 +517,17 @@ GITHUB_USER_MAPPING={"john.doe@company.com": "johndoe", "jane@company.com": "jan
                 assignee_name = assignee.get("displayName", "Unknown")
                 github_username = ""
                 
-                # Try to get authenticated user from session state if available
-                auth_user = st.session_state.get("github_auth_user")
-                if not auth_user and st.session_state.github:
-                    auth_user = run_async(st.session_state.github.call("get_authenticated_user", {}))
-                    if auth_user and not auth_user.get("error"):
-                        st.session_state.github_auth_user = auth_user
+                # Look the authenticated user up at most once per session: a failed
+                # lookup is remembered as {} too (cleared with the GitHub cache)
+                if auth_res is not None:
+                    ok = isinstance(auth_res, dict) and not auth_res.get("error")
+                    auth_user = st.session_state.github_auth_user = auth_res if ok else {}
                 
                 if mapping_method == "Email-based (extract from email)":
                     if assignee_email:
-                        github_username = assignee_email.split("@")[0].replace(".", "-").lower()
+                        github_username = _gh_from_email(assignee_email)
                 else:
-                    mapping_str = os.getenv("GITHUB_USER_MAPPING", "{}")
-                    try:
-                        user_mapping = json.loads(mapping_str)
-                        github_username = user_mapping.get(assignee_email, "")
-                    except:
-                        pass
+                    github_username = _USER_MAPPING.get(assignee_email, "")
                 
                 # Fallback to authenticated user if mapping failed or returned empty
                 if not github_username and auth_user:
@@ -162,115 +536,48 @@ GITHUB_USER_MAPPING={"john.doe@company.com": "johndoe", "jane@company.com": "jan
                 # Step 3: Detect Repository (SMART discovery)
                 repo_owner = default_owner if default_owner else (github_username if github_username else "unknown")
                 
-                # Fetch repositories if not in session
-                repos = st.session_state.get("github_repos", [])
-                if not repos and st.session_state.github:
-                    repo_payload = run_async(st.session_state.github.call("list_repositories", {}))
-                    if repo_payload and not repo_payload.get("error"):
-                        repos = repo_payload.get("repositories", [])
-                        st.session_state.github_repos = repos
-                
-                # Intelligent Guessing
-                project_key = story_key.split("-")[0].lower()
-                guessed_repo = ""
-                
-                # 1. Look for exact match or 'project-app'
-                for r in repos:
-                    r_name = r["name"].lower()
-                    if r_name == project_key or r_name == f"{project_key}-app" or r_name == f"jira-{project_key}":
-                        guessed_repo = r["name"]
-                        break
+                # Repositories were fetched alongside the story (cached across reruns)
+                if repos_error:
+                    st.warning(f"⚠️ Could not list GitHub repositories: {repos_error}")
+                elif not default_name and not repo_index[2]:
+                    # Nothing to discover: a guessed '<project>-app' would only 404
+                    st.error("❌ No accessible repositories found for this GitHub token.")
+                    st.info("💡 Check the token's repo scope, or set the repo name under Advanced Configuration.")
+                    return
                 
-                # 2. Look for any repo containing the project key
-                if not guessed_repo:
-                    for r in repos:
-                        if project_key in r["name"].lower():
-                            guessed_repo = r["name"]
-                            break
+                # Intelligent Guessing (only needed when no repo name was given)
+                project_key = story_key.partition("-")[0].lower()
+                guessed = None if default_name and default_owner else _guess_repo(repo_index, project_key)
+                guessed_repo = guessed["name"] if guessed else ""
                 
                 repo_name = default_name if default_name else (guessed_repo if guessed_repo else f"{project_key}-app")
                 
+                # Owner fallback: take it from the guessed repo's full_name
+                if repo_owner == "unknown" and guessed and "/" in guessed.get("full_name", ""):
+                    repo_owner = guessed["full_name"].split("/", 1)[0]
+                
                 if repo_owner == "unknown":
                     st.warning("⚠️ Could not detect GitHub owner. Using 'unknown' - please verify your GITHUB_TOKEN.")
                 
                 st.success(f"✅ Ready! Tracking **{repo_owner}/{repo_name}**")
                 
                 # Step 4: Perform Analysis (Once)
-                gemini_model = getattr(jira_ui3, 'model', None)
                 tracker = JiraGitHubTracker(
                     jira_client=st.session_state.jira,
                     github_client=st.session_state.github,
-                    gemini_model=gemini_model
+                    gemini_model=_get_model()
                 )
                 
                 st.write("🤖 Running AI Work Validation...")
-                analysis = run_async(
-                    tracker.track_story_commits(
-                        story_key=story_key,
-                        repo_owner=repo_owner,
-                        repo_name=repo_name
-                    )
+                analysis = _analyze(
+                    story_key, repo_owner, repo_name, fields.get("updated", ""),
+                    _tracker=tracker, _story=story_data
                 )
                 
-                # Step 5: Display results
-                if analysis.get("error"):
-                    st.error(f"❌ {analysis['error']}")
-                else:
-                    st.divider()
-                    st.subheader(f"📊 Analysis Result: {story_key}")
-                    
-                    # Metrics
-                    m1, m2, m3, m4 = st.columns(4)
-                    m1.metric("Commits", analysis.get('commit_count', 0))
-                    m2.metric("Comments", len(analysis.get('comments', [])))
-                    m3.metric("Work Status", analysis.get('work_status', 'Unknown'))
-                    m4.metric("Assignee", assignee_name)
-                    
-                    # Validation Results (Gemini)
-                    if analysis.get('validation'):
-                        st.markdown("### ✅ AI Validation Report")
-                        val = analysis['validation']
-                        
-                        v_col1, v_col2 = st.columns([1, 4])
-                        with v_col1:
-                             matching = val.get("matching", "Unknown").strip()
-                             color = "green" if "Yes" in matching else "orange" if "Partial" in matching else "red"
-                             st.markdown(f"<h4 style='color:{color};'>{matching}</h4>", unsafe_allow_html=True)
-                             st.caption("Matches Story?")
-                        
-                        with v_col2:
-                             st.write(f"**Summary:** {val.get('work_summary', 'N/A')}")
-                             if val.get('confidence'):
-                                  st.write(f"**Confidence:** {val['confidence']}")
-                        
-                        if val.get('notes'):
-                             st.warning(f"**Notes:** {val['notes']}")
-                    else:
-                        st.markdown("### 🚫 AI Validation Skipped")
-                        st.info("AI Validation requires commits to compare against acceptance criteria. No commits were detected regarding this story yet.")
-                    
-                    # Commits List
-                    if analysis.get('commits'):
-                        with st.expander(f"📝 View Raw Commits ({len(analysis['commits'])})"):
-                            for commit in analysis['commits']:
-                                st.markdown(f"**{commit['date'][:10]}** | `{commit['sha'][:7]}`: {commit['message']}")
-                    
-                    # Jira Comments List (Lower section as requested)
-                    st.divider()
-                    st.subheader("💬 Jira Activity & Comments")
-                    if analysis.get('comments'):
-                        with st.expander(f"View Jira Comments ({len(analysis['comments'])})", expanded=True):
-                            for comment in analysis['comments']:
-                                author = comment.get('author', 'Unknown')
-                                date = comment.get('created', '').replace('T', ' ')[:16]
-                                body = comment.get('body', '')
-                                st.markdown(f"**{author}** ({date}):")
-                                st.info(body)
-                    elif analysis.get('comments_error'):
-                        st.error(f"❌ Failed to fetch comments: {analysis['comments_error']}")
-                        st.info("💡 **Possible cause:** Your Jira API Token might lack 'Browse Projects' or 'View Comments' permissions for this project.")
-                    else:
-                        st.info("ℹ️ No comments found in Jira for this story.")
+                # Step 5: Display results (a fresh Track starts back at page one)
+                for state_key in (f"commits_shown_{story_key}", f"comments_shown_{story_key}", f"comments_{story_key}"):
+                    st.session_state.pop(state_key, None)
+                _render_analysis(analysis, story_key, assignee_name)
                 
             except Exception as e:
                 st.error(f"Error during tracking: {e}")
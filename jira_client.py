@@ -9,21 +9,40 @@ Capabilities:
 ✅ Memory-based context across sessions
 
 Requirements:
-    pip install mcp python-dotenv google-generativeai
+    pip install mcp python-dotenv google-generativeai orjson
+    Optional: numpy (semantic query cache), uvloop (faster event loop, not on Windows)
 
 Environment:
     GEMINI_API_KEY, JIRA_BASE, JIRA_EMAIL, JIRA_API_TOKEN
 """
 
 import os
+import re
 import json
+import time
 import asyncio
-from typing import Any, Dict, List, Optional
-from datetime import datetime, timedelta
+import hashlib
+import threading
+import orjson
+from collections import OrderedDict, deque
+from itertools import islice
+from typing import Any, Callable, Dict, List, Optional
+from datetime import date, datetime, timedelta
 from dotenv import load_dotenv
 from mcp import ClientSession
 from mcp.client.stdio import stdio_client, StdioServerParameters
 import google.generativeai as genai
+from google.generativeai import caching
+
+try:
+    import numpy as np
+except ImportError:  # The semantic analysis cache is optional
+    np = None
+
+try:
+    import uvloop
+except ImportError:  # Not available on Windows; the stock loop works the same
+    uvloop = None
 
 load_dotenv()
 
@@ -34,19 +53,164 @@ genai.configure(api_key=GEMINI_API_KEY)
 
 JIRA_BASE = os.getenv("JIRA_BASE", "https://your-domain.atlassian.net")
 
+GEMINI_MODEL = "gemini-2.5-flash"
+# Intent/tool-choice JSON and single small results don't need the full model
+ANALYSIS_MODEL = "gemini-2.5-flash-lite"
+# Tool output (as sent to the formatter) above this goes to GEMINI_MODEL
+LARGE_RESULT_CHARS = 1500
+# Lifetime of the server-side cache holding the static analysis prompt
+PROMPT_CACHE_TTL = timedelta(hours=1)
+
+# Usage hints that steer tool choice, shown instead of the server's description
+_TOOL_HINTS = {
+    "get_issue": "Full details of one issue (e.g. CT-3)",
+    "search_issues": "JQL search. CRITICAL: ISO dates, e.g. updated >= \"2025-11-17\"",
+    "get_issue_comments": "All comments on one issue",
+    "add_comment": "Comment on an issue",
+    "create_issue": "New issue",
+    "transition_issue": "Change status (e.g. Done, In Progress)",
+    "list_boards": "All accessible boards/projects",
+    "list_sprints": "Sprints of a board",
+    "list_board_issues": "Issues on a board",
+    "get_users": "Find users by name or email",
+    "get_recent_comments": "Recent comments across all issues",
+    "get_dashboard_data": "Project metrics: status counts, priority distribution",
+    "get_priorities": "Priority levels",
+    "throughput": "Issues completed in a period",
+    "issue_cycle_times": "Cycle times, start to completion",
+    "extract_comments_by_user": "Deprecated - use get_comments_by_author",
+    "extract_components_by_user": "Components grouped by assignee",
+    "get_dependencies": "CRITICAL: issue links/dependencies - use for dependency graphs and relationships",
+    "search_jira": "Search returning full issues with comments and links",
+    "get_comments_by_author": "CRITICAL: ALWAYS use for 'comments by [name]'; partial names work (e.g. 'rav')"
+}
+
+# Tools that only read Jira; their results are reused for TOOL_CACHE_TTL seconds.
+# Any other tool may write, and running one drops the whole cache.
+READ_ONLY_TOOLS = frozenset({
+    "get_issue", "search_issues", "get_issue_comments", "list_boards", "list_sprints",
+    "list_board_issues", "get_users", "get_recent_comments", "get_dashboard_data",
+    "get_priorities", "throughput", "issue_cycle_times", "extract_comments_by_user",
+    "extract_components_by_user", "get_dependencies", "search_jira", "get_comments_by_author",
+    "list_projects", "search_projects", "get_project_details", "get_issue_createmeta",
+    "list_components", "get_myself", "get_board_configuration", "get_filter",
+    "get_project_statuses", "list_board_backlog", "get_issue_transitions", "list_epics"
+})
+TOOL_CACHE_TTL = 60
+# Recent issues fetched into the tool cache while the user types the next query
+PREFETCH_ISSUES = 3
+
+# Analyses reused for a repeated query (same wording, same previous turn)
+ANALYSIS_CACHE_SIZE = 256
+_WHITESPACE_RE = re.compile(r"\s+")
+
+# Paraphrases ("list my issues" / "show me my tickets") reuse an analysis when
+# their embeddings are this similar and they name the same literals
+EMBEDDING_MODEL = "models/text-embedding-004"
+SEMANTIC_THRESHOLD = 0.92
+SEMANTIC_CACHE_SIZE = 256
+# Issue keys, numbers, quoted text and the word after by/from/for/to: similar
+# embeddings alone would conflate "get CT-3" with "get CT-5"
+_LITERAL_RE = re.compile(
+    r"""[a-z][a-z0-9]*-\d+|\d+|"[^"]*"|'[^']*'|(?<=\bby )\w+|(?<=\bfrom )\w+|(?<=\bfor )\w+|(?<=\bto )\w+""",
+    re.IGNORECASE
+)
+# Queries answered without asking Gemini: the whole query is "comments by <name>"
+# (optionally "search for / get / find / show me ... "), a bare greeting, help,
+# or a single issue lookup
+_COMMENTS_BY_RE = re.compile(
+    r"""^\s*(?:(?:search|get|find|show)(?:\s+me)?\s+(?:for\s+)?)?(?:all\s+)?(?:the\s+)?"""
+    r"""comments?\s+(?:by|from)\s+["']?(?!(?:me|today|yesterday|everyone|anyone)\b)([a-zA-Z]+)["']?\s*[?.!]*\s*$""",
+    re.IGNORECASE
+)
+_AUTHOR_RE = re.compile(r'(?:by|from)\s+["\']?([a-zA-Z]+)["\']?', re.IGNORECASE)
+_GREETING_REPLIES = {
+    "hi": "Hi there! 👋 I'm your Jira assistant, ready to help with anything from checking issue status to analyzing team metrics. What can I help you with today?",
+    "hello": "Hello! 👋 I'm your Jira assistant, ready to help with anything from checking issue status to analyzing team metrics. What can I help you with today?",
+    "hey": "Hey! 👋 What can I help you with in Jira today?",
+    "thanks": "You're very welcome! 😊 Let me know if you need anything else with your Jira projects.",
+    "thank you": "You're very welcome! 😊 Let me know if you need anything else with your Jira projects."
+}
+_GREETING_STRIP = " \t!.?,😊👋🙂"
+# "CT-3", "status of CT-3", "CT-3 status", "show me CT-3", ...: a plain issue lookup.
+# Only the surrounding words ignore case: the key itself must be upper-case, so
+# "covid-19" or "sprint-2" never skip the analysis. The action group is empty
+# for a bare key, which mid-conversation may answer the previous question.
+_ISSUE_LOOKUP_RE = re.compile(
+    r"""^\s*(?P<action>(?i:(?:what(?:'s|\s+is)\s+)?(?:the\s+)?status\s+of\s+|(?:show|get|open)(?:\s+me)?\s+))?"""
+    r"""\b(?P<key>[A-Z][A-Z0-9]{1,9}-\d+)\b(?P<status>(?i:\s+status))?\s*[?.!]*\s*$"""
+)
+_HELP_QUERIES = frozenset({"help", "what can you do", "what can you do for me"})
+_HELP_REPLY = (
+    "Here's what I can do for you: 🎯\n"
+    "• 🔍 Find issues - \"recent CT issues\", \"CT-3\", \"bugs assigned to John\"\n"
+    "• 💬 Comments - \"comments on CT-3\", \"comments by Ravinder\"\n"
+    "• ✅ Updates - create issues, add comments, move issues to Done\n"
+    "• 📋 Boards and sprints - what's on a board, active sprints, the backlog\n"
+    "• 📊 Metrics - throughput, cycle times, status breakdowns\n\n"
+    "Commands: 'memory' (view context) | 'clear' (reset) | 'quit' (exit)"
+)
+
+# Outermost {...} of a reply, with or without a ```json fence or leading prose
+_JSON_BLOCK_RE = re.compile(r"\{.*\}", re.DOTALL)
+
+# Pre-check: common Jira patterns that should NEVER be chat. A query matches a
+# group when it contains every word of it (as a substring, so 'board' also
+# matches 'boards'); all groups are folded into one pattern of lookaheads.
+_JIRA_KEYWORDS = (
+    ('comment', 'by'), ('comment', 'from'), ('comments', 'by'), ('comments', 'from'),
+    ('search', 'comment'), ('get', 'comment'), ('find', 'comment'),
+    ('search', 'issue'), ('get', 'issue'), ('find', 'issue'),
+    ('show', 'issue'), ('list', 'issue'), ('recent', 'issue'),
+    ('dependency', 'graph'), ('dependencies',), ('issue', 'link'),
+    ('dashboard',), ('metric',), ('velocity',), ('throughput',),
+    ('sprint',), ('board',), ('project',)
+)
+_JIRA_PRECHECK_RE = re.compile(
+    "|".join("".join(f"(?=.*{re.escape(kw)})" for kw in group) for group in _JIRA_KEYWORDS),
+    re.IGNORECASE | re.DOTALL
+)
+
+
+# History is an append-only JSONL log; it is compacted back down to
+# HISTORY_KEEP lines once it grows past HISTORY_COMPACT_AT
+HISTORY_LOAD = 30
+HISTORY_KEEP = 100
+HISTORY_COMPACT_AT = 200
+# Seconds between background flushes of new turns to disk
+MEMORY_FLUSH_INTERVAL = 5
+
+# Most recent distinct values kept per entity type
+ENTITY_CACHE_SIZE = 15
+ENTITY_TYPES = ("issues", "boards", "users", "projects")
+
+# The last answer asked the user for more information (substring match, as
+# 'needs' / 'provided' count too)
+_FOLLOWUP_RE = re.compile(r"need|provide|tell me", re.IGNORECASE)
+
 
 class ConversationMemory:
-    """Stores conversation history and context."""
+    """
+    Stores conversation history and context.
     
-    def __init__(self, memory_file: str = "jira_memory.json"):
+    History is appended one JSON line per turn to history_file; entities and
+    preferences live in the small memory_file, rewritten only when they change.
+    Turns are buffered in memory and written by flush().
+    """
+    
+    def __init__(self, memory_file: str = "jira_memory.json", history_file: str = "jira_memory.jsonl"):
         self.memory_file = memory_file
-        self.conversation_history: List[Dict[str, Any]] = []
-        self.entity_cache: Dict[str, List[str]] = {
-            "issues": [],
-            "boards": [],
-            "users": [],
-            "projects": []
-        }
+        self.history_file = history_file
+        # Only the newest turns are kept in RAM; the full log stays on disk
+        self.conversation_history: deque = deque(maxlen=HISTORY_LOAD)
+        self._history_lines = 0
+        self._pending_lines: List[bytes] = []  # Recorded turns not yet on disk
+        self._state_dirty = False
+        self._context: Optional[str] = None  # get_context_for_llm() until memory changes
+        # Newest first; the sets mirror the deques for O(1) membership checks
+        self.entity_cache: Dict[str, deque] = {}
+        self._entity_seen: Dict[str, set] = {}
+        self._reset_entities()
         self.user_preferences: Dict[str, Any] = {
             "name": None,
             "default_project": None,
@@ -57,86 +221,179 @@ class ConversationMemory:
     def load_memory(self):
         try:
             if os.path.exists(self.memory_file):
-                with open(self.memory_file, 'r') as f:
-                    data = json.load(f)
-                    self.conversation_history = data.get("history", [])[-30:]
-                    self.entity_cache = data.get("entities", self.entity_cache)
-                    self.user_preferences = data.get("preferences", self.user_preferences)
-                    if self.conversation_history:
-                        print(f"📚 Loaded {len(self.conversation_history)} past conversations")
+                with open(self.memory_file, 'rb') as f:
+                    data = orjson.loads(f.read())
+                self._reset_entities(data.get("entities", {}))
+                self.user_preferences = data.get("preferences", self.user_preferences)
+                if "history" in data:
+                    self._migrate_history(data["history"])
+            self._load_history()
+            self._context = None
+            if self.conversation_history:
+                print(f"📚 Loaded {len(self.conversation_history)} past conversations")
         except Exception as e:
             print(f"⚠️ Memory load failed: {e}")
     
+    def _reset_entities(self, saved: Optional[Dict[str, List[str]]] = None):
+        saved = saved or {}
+        self._context = None
+        for key in ENTITY_TYPES:
+            values = list(dict.fromkeys(saved.get(key, [])))[:ENTITY_CACHE_SIZE]
+            self.entity_cache[key] = deque(values, maxlen=ENTITY_CACHE_SIZE)
+            self._entity_seen[key] = set(values)
+    
+    def _remember_entities(self, key: str, values: List[str]) -> bool:
+        """Move values to the front of an entity cache; True if anything moved"""
+        cache, seen = self.entity_cache[key], self._entity_seen[key]
+        changed = False
+        # Walk backwards so the first of the new values ends up in front
+        for value in reversed(values):
+            if value in seen:
+                if cache[0] == value:
+                    continue
+                cache.remove(value)
+            else:
+                if len(cache) == cache.maxlen:
+                    seen.discard(cache[-1])  # appendleft drops it from the deque
+                seen.add(value)
+            cache.appendleft(value)
+            changed = True
+        return changed
+    
+    def _load_history(self):
+        """Read only the last HISTORY_LOAD entries of the JSONL log"""
+        if not os.path.exists(self.history_file):
+            return
+        tail = deque(maxlen=HISTORY_LOAD)
+        self._history_lines = 0
+        with open(self.history_file, 'rb') as f:
+            for line in f:
+                tail.append(line)
+                self._history_lines += 1
+        history = deque(maxlen=HISTORY_LOAD)
+        for line in tail:
+            try:
+                history.append(orjson.loads(line))
+            except ValueError:
+                continue  # A torn last line from an interrupted write
+        self.conversation_history = history
+    
+    def _migrate_history(self, history: List[Dict[str, Any]]):
+        """Move history out of a single-file jira_memory.json into the JSONL log"""
+        if not os.path.exists(self.history_file):
+            with open(self.history_file, 'wb') as f:
+                f.writelines(orjson.dumps(entry) + b"\n" for entry in history[-HISTORY_KEEP:])
+        self.save_memory()
+        print(f"📦 Moved conversation history to {self.history_file}")
+    
+    def _compact_history(self):
+        """Rewrite the log with only its last HISTORY_KEEP lines"""
+        with open(self.history_file, 'rb') as f:
+            keep = deque(f, maxlen=HISTORY_KEEP)
+        tmp_path = self.history_file + ".tmp"
+        with open(tmp_path, 'wb') as f:
+            f.writelines(keep)
+        os.replace(tmp_path, self.history_file)
+        self._history_lines = len(keep)
+    
     def save_memory(self):
+        """Write entities and preferences (history is appended by flush)"""
         try:
-            with open(self.memory_file, 'w') as f:
-                json.dump({
-                    "history": self.conversation_history[-100:],
-                    "entities": self.entity_cache,
+            tmp_path = self.memory_file + ".tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(orjson.dumps({
+                    "entities": {key: list(values) for key, values in self.entity_cache.items()},
                     "preferences": self.user_preferences,
                     "timestamp": datetime.now().isoformat()
-                }, f, indent=2)
+                }, option=orjson.OPT_INDENT_2))
+            # Atomic: a crash mid-write leaves the previous file intact
+            os.replace(tmp_path, self.memory_file)
+            self._state_dirty = False
         except Exception as e:
             print(f"⚠️ Memory save failed: {e}")
     
+    def flush(self):
+        """Write buffered turns and any entity changes to disk"""
+        if self._pending_lines:
+            lines, self._pending_lines = self._pending_lines, []
+            try:
+                with open(self.history_file, 'ab') as f:
+                    f.writelines(lines)
+                self._history_lines += len(lines)
+                if self._history_lines > HISTORY_COMPACT_AT:
+                    self._compact_history()
+            except Exception as e:
+                print(f"⚠️ Memory save failed: {e}")
+        if self._state_dirty:
+            self.save_memory()
+    
     def add_interaction(self, user_query: str, assistant_response: str, 
                         interaction_type: str, tool_calls: List[str] = None, 
                         entities: Dict[str, List[str]] = None):
         """Record interaction with type classification."""
-        self.conversation_history.append({
+        entry = {
             "timestamp": datetime.now().isoformat(),
             "type": interaction_type,  # "chat", "jira_query", "jira_action"
             "user": user_query,
             "assistant": assistant_response[:400],
+            "assistant_short": assistant_response[:150],  # What the LLM context shows
             "tools": tool_calls or [],
             "entities": entities or {}
-        })
+        }
+        self.conversation_history.append(entry)
+        self._pending_lines.append(orjson.dumps(entry) + b"\n")
+        self._context = None
         
         # Update entity cache
         if entities:
             for key, values in entities.items():
                 if values and key in self.entity_cache:
-                    combined = values + self.entity_cache[key]
-                    self.entity_cache[key] = list(dict.fromkeys(combined))[:15]
-        
-        self.save_memory()
+                    self._state_dirty |= self._remember_entities(key, values)
+    
+    @staticmethod
+    def _format_turn(i: int, interaction: Dict[str, Any]) -> str:
+        """One history entry as a single block of the LLM context"""
+        # Entries saved before assistant_short existed still need the slice
+        short = interaction.get('assistant_short') or interaction['assistant'][:150]
+        block = (f"\n[{interaction.get('type', 'unknown').upper()}] Turn {i}:\n"
+                 f"User: {interaction['user']}\n"
+                 f"Assistant: {short}...")
+        if interaction.get('tools'):
+            block += f"\nActions: {', '.join(interaction['tools'])}"
+        issues = (interaction.get('entities') or {}).get('issues')
+        if issues:
+            block += f"\nIssues mentioned: {', '.join(issues)}"
+        return block
     
     def get_context_for_llm(self) -> str:
+        """Rich context for the LLM, rebuilt only after the memory changes"""
+        if self._context is None:
+            self._context = self._build_context()
+        return self._context
+    
+    def _build_context(self) -> str:
         """Build rich context for LLM with emphasis on recent queries."""
         if not self.conversation_history:
             return "This is a new conversation."
         
-        recent = self.conversation_history[-5:]
+        history = self.conversation_history
+        recent = list(islice(history, max(len(history) - 5, 0), None))
         lines = ["=== Recent Conversation (READ CAREFULLY for follow-ups!) ==="]
         
-        for i, interaction in enumerate(recent, 1):
-            itype = interaction.get('type', 'unknown')
-            lines.append(f"\n[{itype.upper()}] Turn {i}:")
-            lines.append(f"User: {interaction['user']}")
-            lines.append(f"Assistant: {interaction['assistant'][:150]}...")
-            if interaction.get('tools'):
-                lines.append(f"Actions: {', '.join(interaction['tools'])}")
-            if interaction.get('entities'):
-                ent = interaction['entities']
-                if ent.get('issues'):
-                    lines.append(f"Issues mentioned: {', '.join(ent['issues'])}")
+        lines.extend(self._format_turn(i, interaction) for i, interaction in enumerate(recent, 1))
         
         lines.append("\n=== Recent Entities Cache ===")
         if self.entity_cache["issues"]:
-            lines.append(f"Recent issues: {', '.join(self.entity_cache['issues'][:5])}")
+            lines.append(f"Recent issues: {', '.join(islice(self.entity_cache['issues'], 5))}")
         if self.entity_cache["users"]:
-            lines.append(f"Recent users: {', '.join(self.entity_cache['users'][:3])}")
+            lines.append(f"Recent users: {', '.join(islice(self.entity_cache['users'], 3))}")
         if self.entity_cache["projects"]:
-            lines.append(f"Projects: {', '.join(self.entity_cache['projects'][:3])}")
+            lines.append(f"Projects: {', '.join(islice(self.entity_cache['projects'], 3))}")
         
         # Add pending context hints
-        if recent:
-            last_query = recent[-1]['user'].lower()
-            last_response = recent[-1]['assistant'].lower()
-            
-            if 'need' in last_response or 'provide' in last_response or 'tell me' in last_response:
-                lines.append("\n⚠️ IMPORTANT: Previous response asked user for more information!")
-                lines.append(f"   Question was about: {last_query}")
+        if recent and _FOLLOWUP_RE.search(recent[-1]['assistant']):
+            lines.append("\n⚠️ IMPORTANT: Previous response asked user for more information!")
+            lines.append(f"   Question was about: {recent[-1]['user']}")
         
         if self.user_preferences.get("name"):
             lines.append(f"\nUser name: {self.user_preferences['name']}")
@@ -147,120 +404,131 @@ class ConversationMemory:
     
     def clear(self):
         """Reset memory."""
-        self.conversation_history = []
-        self.entity_cache = {"issues": [], "boards": [], "users": [], "projects": []}
+        self.conversation_history.clear()
+        self._reset_entities()
+        self._pending_lines = []
+        try:
+            open(self.history_file, 'w').close()
+            self._history_lines = 0
+        except OSError as e:
+            print(f"⚠️ Memory clear failed: {e}")
         self.save_memory()
 
 
-class UniversalJiraAssistant:
-    """Fully dynamic Jira assistant - handles ANY query type."""
-    
-    def __init__(self, server_command: str = "python", server_args: List[str] = None):
-        if server_args is None:
-            server_args = ["jira_mcp_server.py"]
-        
-        self.server_params = StdioServerParameters(command=server_command, args=server_args)
-        self.session: Optional[ClientSession] = None
-        self.available_tools: Dict[str, Any] = {}
-        self.memory = ConversationMemory()
-        self.model = genai.GenerativeModel(
-            'gemini-2.5-flash',
-            generation_config=genai.GenerationConfig(
-                temperature=0.3,
-                top_p=0.95,
-                max_output_tokens=2048
-            )
-        )
-    
-    async def __aenter__(self):
-        self._stdio_client = stdio_client(self.server_params)
-        self._read_write = await self._stdio_client.__aenter__()
-        self.session = await ClientSession(self._read_write[0], self._read_write[1]).__aenter__()
-        await self.session.initialize()
-        
-        tools_result = await self.session.list_tools()
-        self.available_tools = {t.name: t for t in tools_result.tools}
-        
-        print(f"\n{'='*70}")
-        print(f"🤖 Universal Jira Assistant - Fully Dynamic")
-        print(f"{'='*70}")
-        print(f"📊 Connected to: {JIRA_BASE}")
-        print(f"🔧 Available tools: {len(self.available_tools)}")
-        print(f"🧠 Memory: {len(self.memory.conversation_history)} conversations loaded")
-        print(f"✨ Mode: 100% LLM-driven (handles any query)")
-        print(f"{'='*70}\n")
-        
-        return self
+# Tool results are cut to this many characters before going into the prompt
+RESULT_CHARS = 2000
+_RESULT_ENCODER = json.JSONEncoder(default=str, ensure_ascii=False)
+
+
+def _bounded_dump(obj: Any, max_chars: int = RESULT_CHARS) -> str:
+    """
+    JSON-encode obj, stopping once max_chars have been produced, so a large
+    search result is never serialized in full just to be cut down
+    """
+    if isinstance(obj, str):
+        return obj[:max_chars]
+    parts, size = [], 0
+    for chunk in _RESULT_ENCODER.iterencode(obj):
+        parts.append(chunk)
+        size += len(chunk)
+        if size >= max_chars:
+            break
+    return "".join(parts)[:max_chars]
+
+
+# Keys a list-returning tool puts its items under, and how many items a
+# locally formatted reply shows
+_RESULT_LIST_KEYS = ("issues", "comments", "users", "values", "boards", "sprints")
+LOCAL_ITEMS_SHOWN = 20
+
+
+def _result_data(result: Any) -> Any:
+    """Payload of an MCP tool result: structured content, else the parsed text parts"""
+    if hasattr(result, "structuredContent"):
+        return result.structuredContent
+    try:
+        texts = [orjson.loads(c.text) for c in getattr(result, "content", [])]
+        return texts[0] if len(texts) == 1 else texts
+    except (ValueError, TypeError, AttributeError):  # Non-JSON or non-text content
+        return str(result)[:800]
+
+
+def _item_line(item: Any) -> str:
+    """One bullet for an issue, comment, user or board"""
+    if not isinstance(item, dict):
+        return f"• {item}"
+    fields = item.get("fields") or {}
+    if item.get("key"):
+        status = (fields.get("status") or {}).get("name")
+        summary = fields.get("summary", "")
+        return f"• {item['key']}: {summary}" + (f" ({status})" if status else "")
+    if "body" in item:
+        body = str(item.get("body") or "").replace("\n", " ")
+        return f"• {item.get('author', 'Unknown')}: {body[:120]}"
+    return f"• {item.get('displayName') or item.get('name') or item.get('id', item)}"
+
+
+# chat_loop words that end the session
+_QUIT_COMMANDS = frozenset({"quit", "exit", "q", "bye"})
+
+
+async def _ainput(prompt: str) -> str:
+    """
+    input() on a daemon thread, so the event loop keeps running background
+    work while the user types. Not asyncio.to_thread: a read still blocked at
+    Ctrl+C would hold up the default executor's shutdown.
+    """
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
     
-    async def __aexit__(self, exc_type, exc, tb):
-        if self.session:
-            await self.session.__aexit__(exc_type, exc, tb)
-        await self._stdio_client.__aexit__(exc_type, exc, tb)
+    def settle(method, value):
+        if not future.done():
+            method(value)
     
-    def _get_comprehensive_tools_info(self) -> str:
-        """Generate detailed tool documentation."""
-        tools_info = {
-            "get_issue": "Get full details of a specific issue by key (e.g., CT-3)",
-            "search_issues": "Search issues using JQL. CRITICAL: Use ISO dates like 'updated >= \"2025-11-17\"'",
-            "get_issue_comments": "Get all comments for a specific issue",
-            "add_comment": "Add a new comment to an issue",
-            "create_issue": "Create a new Jira issue (requires project, summary, type)",
-            "transition_issue": "Change issue status (e.g., move to Done, In Progress)",
-            "list_boards": "List all accessible Jira boards/projects",
-            "list_sprints": "List sprints for a board (requires board_id)",
-            "list_board_issues": "Get issues for a specific board",
-            "get_users": "Search for users by name or email",
-            "get_recent_comments": "Get recent comments across all issues (specify days)",
-            "get_dashboard_data": "Get project metrics, status counts, priority distribution",
-            "get_priorities": "List all available priority levels",
-            "throughput": "Calculate throughput (issues completed in time period)",
-            "issue_cycle_times": "Analyze cycle times from start to completion",
-            "extract_comments_by_user": "Get all comments by a specific user (deprecated - use get_comments_by_author)",
-            "extract_components_by_user": "Get components grouped by assignee",
-            "get_dependencies": "CRITICAL: Get issue dependencies and link relationships (use for dependency graphs, issue relationships)",
-            "search_jira": "Enhanced search with comments and links (returns full issue objects with relationships)",
-            "get_comments_by_author": "CRITICAL: Get comments by specific author/user. Supports partial names (e.g., 'rav', 'ravi', 'ravinder'). ALWAYS use this for 'comments by [name]' queries"
-        }
-        
-        lines = ["AVAILABLE JIRA TOOLS:"]
-        for tool_name, desc in tools_info.items():
-            if tool_name in self.available_tools:
-                lines.append(f"• {tool_name}: {desc}")
-        
-        return "\n".join(lines)
+    def read():
+        try:
+            line = input(prompt)
+        except Exception as e:  # EOFError once stdin is closed
+            loop.call_soon_threadsafe(settle, future.set_exception, e)
+        else:
+            loop.call_soon_threadsafe(settle, future.set_result, line)
     
-    async def analyze_and_respond(self, user_query: str) -> Dict[str, Any]:
-        """
-        Universal LLM analyzer - decides EVERYTHING:
-        1. Is this casual chat or Jira work?
-        2. What tools (if any) are needed?
-        3. How to respond naturally?
-        """
-        
-        # Pre-check: Common Jira patterns that should NEVER be chat
-        query_lower = user_query.lower()
-        jira_keywords = [
-            ('comment', 'by'), ('comment', 'from'), ('comments', 'by'), ('comments', 'from'),
-            ('search', 'comment'), ('get', 'comment'), ('find', 'comment'),
-            ('search', 'issue'), ('get', 'issue'), ('find', 'issue'),
-            ('show', 'issue'), ('list', 'issue'), ('recent', 'issue'),
-            ('dependency', 'graph'), ('dependencies',), ('issue', 'link'),
-            ('dashboard',), ('metric',), ('velocity',), ('throughput',),
-            ('sprint',), ('board',), ('project',)
-        ]
-        
-        forced_jira_query = False
-        for keywords in jira_keywords:
-            if all(kw in query_lower for kw in keywords):
-                forced_jira_query = True
-                break
-        
-        context = self.memory.get_context_for_llm()
-        tools_info = self._get_comprehensive_tools_info()
-        current_date = datetime.now().date().isoformat()
-        seven_days_ago = (datetime.now().date() - timedelta(days=7)).isoformat()
-        
-        analysis_prompt = f"""You are a versatile AI assistant specializing in Jira project management. You can handle ANYTHING:
+    threading.Thread(target=read, name="chat-input", daemon=True).start()
+    return await future
+
+
+def _normalize_analysis(raw: Any) -> Dict[str, Any]:
+    """
+    Check the shape of a parsed analysis once, so later code can index it
+    directly. Malformed tool calls are dropped; a non-object reply raises
+    ValueError and takes the analysis fallback.
+    """
+    if not isinstance(raw, dict):
+        raise ValueError(f"analysis is a JSON {type(raw).__name__}, not an object")
+    calls = []
+    for call in raw.get("tool_calls") or []:
+        if isinstance(call, dict) and isinstance(call.get("tool_name"), str):
+            args = call.get("tool_args")
+            calls.append({**call, "tool_args": args if isinstance(args, dict) else {}})
+    entities = raw.get("extracted_entities")
+    entities = entities if isinstance(entities, dict) else {}
+    raw["tool_calls"] = calls
+    raw["needs_jira_tools"] = str(raw.get("needs_jira_tools")).lower() == "true"  # Also "true" as a string
+    raw["extracted_entities"] = {
+        key: [str(v) for v in ([values] if isinstance(values, str) else values)]
+        for key, values in entities.items() if isinstance(values, (str, list))
+    }
+    return raw
+
+
+def _user_content(prompt: str) -> List[Dict[str, Any]]:
+    """A prompt already in the SDK's content shape, so it is not re-coerced per call"""
+    return [{"role": "user", "parts": [prompt]}]
+
+
+# Static part of the analysis prompt (literal braces are doubled for str.format):
+# instructions and rules, then worked examples
+_ANALYSIS_RULES_TEMPLATE = """You are a versatile AI assistant specializing in Jira project management. You can handle ANYTHING:
 - Casual conversation ("Hi", "How are you?", "Thanks!")
 - Jira queries ("show me recent issues", "what's the status of CT-3?")
 - Jira actions ("add comment to CT-3", "create a bug for login issue")
@@ -286,11 +554,6 @@ SEVEN DAYS AGO: {seven_days_ago}
 
 {tools_info}
 
-CONVERSATION CONTEXT:
-{context}
-
-USER QUERY: "{user_query}"
-
 CRITICAL CONTEXT RULES:
 1. **Read the conversation history carefully** - if the previous query mentioned something specific, consider it context
 2. **Short queries** (like "CT-3" or "that one") are usually follow-ups - link them to previous requests
@@ -316,6 +579,8 @@ Analyze the query and decide how to respond. Return JSON:
     }}
   ],
   "direct_response": "If no tools needed, respond directly here",
+  "format_locally": true/false,
+  "response_template": "Reply for a single list-returning tool call, using {{count}} and {{items}}",
   "extracted_entities": {{
     "issues": ["CT-3"],
     "users": ["John"],
@@ -324,6 +589,12 @@ Analyze the query and decide how to respond. Return JSON:
   }}
 }}
 
+LOCAL FORMATTING:
+- For ONE read-only tool call that returns a plain list (issues, comments, users, boards), set
+  "format_locally": true and a friendly "response_template", e.g. "🔍 Found {{count}} recent CT issues:\\n{{items}}"
+- {{count}} is the number of results and {{items}} a bulleted list of them - no other placeholders
+- Otherwise (several tools, actions, anything needing interpretation) set "format_locally": false
+
 QUERY TYPE GUIDE:
 - "chat": ONLY for greetings ("Hi", "Hello", "Thanks"), farewells ("Bye"), or appreciation → No tools needed
 - "jira_query": ANY request for Jira information (even if phrased formally like "Search for...") → Need query tools
@@ -350,7 +621,11 @@ REFERENCE RESOLUTION:
 
 EXAMPLES:
 
-Example 1 - Casual Chat:
+"""
+
+# Chat and comments-by are the two most-confused query types; the compact
+# prompt keeps only their examples
+_CHAT_EXAMPLE = """Example 1 - Casual Chat:
 User: "Hi! How are you?"
 {{
   "query_type": "chat",
@@ -362,7 +637,9 @@ User: "Hi! How are you?"
   "extracted_entities": {{"issues": [], "users": [], "boards": [], "projects": []}}
 }}
 
-Example 2 - Simple Jira Query:
+"""
+
+_QUERY_EXAMPLES = """Example 2 - Simple Jira Query:
 User: "show me recent CT issues"
 {{
   "query_type": "jira_query",
@@ -500,7 +777,9 @@ Context: User just saw list of bugs
   "extracted_entities": {{"issues": ["CT-5"], "users": [], "boards": [], "projects": ["CT"]}}
 }}
 
-Example 10 - Comments by Specific User:
+"""
+
+_COMMENTS_EXAMPLE = """Example 10 - Comments by Specific User:
 User: "comments by ravinder"
 {{
   "query_type": "jira_query",
@@ -516,7 +795,9 @@ User: "comments by ravinder"
   "extracted_entities": {{"issues": [], "users": ["ravinder"], "boards": [], "projects": []}}
 }}
 
-Example 11 - Comments by User with Partial Name:
+"""
+
+_COMMENT_VARIANT_EXAMPLES = """Example 11 - Comments by User with Partial Name:
 User: "what did rivo comment?"
 {{
   "query_type": "jira_query",
@@ -564,20 +845,481 @@ User: "Get comments by John"
   "extracted_entities": {{"issues": [], "users": ["John"], "boards": [], "projects": []}}
 }}
 
-RESPOND WITH VALID JSON ONLY."""
+"""
+
+_ANALYSIS_CLOSING = "The conversation context and the user query to analyze follow."
+
+_ANALYSIS_PROMPT_TEMPLATE = (
+    _ANALYSIS_RULES_TEMPLATE + _CHAT_EXAMPLE + _QUERY_EXAMPLES
+    + _COMMENTS_EXAMPLE + _COMMENT_VARIANT_EXAMPLES + _ANALYSIS_CLOSING
+)
+# Rules plus the core examples, for when the full prompt would be resent every turn
+_COMPACT_PROMPT_TEMPLATE = _ANALYSIS_RULES_TEMPLATE + _CHAT_EXAMPLE + _COMMENTS_EXAMPLE + _ANALYSIS_CLOSING
+
+# Per-turn part, sent after the (cached) static part
+_ANALYSIS_TAIL_TEMPLATE = """CONVERSATION CONTEXT:
+{context}
+
+USER QUERY: "{user_query}"
+"""
+
+# Reply style for format_results_naturally. It leads every formatting prompt
+# unchanged, so Gemini's implicit caching can reuse the prefix; the per-turn
+# part goes last.
+_FORMAT_GUIDE = """You are responding to a colleague about Jira. Be natural, friendly, and helpful.
+
+RESPOND NATURALLY:
+• Talk like a helpful colleague, not a robot
+• Use "I", "you", conversational phrases
+• Add emojis for clarity (📝🔍✅💬👤📋🎯📊⚡🐛🎉)
+• Highlight important info
+• Offer insights or next steps
+• If multiple items, prioritize and summarize
+• Ask follow-up questions when helpful
+
+EXAMPLES:
+
+For recent issues:
+"🔍 I found 8 issues active in the last week! Here's what stands out:
+
+**Needs Attention:**
+• CT-3: Login bug - In progress, looks like John's working on it
+• CT-8: Performance issue - Still waiting to be picked up
+
+**Recently Completed:**
+• CT-5: Documentation update - Closed yesterday, nice work!
+
+Want me to dive deeper into any of these?"
+
+For adding comment:
+"✅ Done! Your comment is now on CT-3. The team will see it in their notifications."
+
+For metrics:
+"📊 Here's how things look this month:
+
+**Velocity:** 23 issues completed (up from 18 last month! 🎉)
+**Current Load:** 12 in progress, 5 waiting to start
+**Focus Areas:** 3 high-priority items need attention
+
+Overall, the team's moving at a healthy pace. The completion rate is solid!"
+
+For users:
+"👥 I found 5 active team members:
 
+• John Doe - Main developer, very active
+• Jane Smith - Product lead
+• Mike Chen - Design
+
+Everyone's account is active. Who do you need to connect with?"
+"""
+
+_FORMAT_TAIL_TEMPLATE = """USER ASKED: "{original_query}"
+QUERY TYPE: {query_type}
+YOUR UNDERSTANDING: {understanding}
+
+WHAT YOU FOUND:
+{results_json}
+
+RESPOND NOW (no JSON, just natural text):"""
+
+
+class SemanticCache:
+    """
+    Analyses indexed by query embedding. Vectors are stored unit-length in one
+    matrix, so a lookup is a single matrix-vector product; the oldest entry
+    is overwritten once the cache is full.
+    """
+    
+    def __init__(self, size: int = SEMANTIC_CACHE_SIZE, threshold: float = SEMANTIC_THRESHOLD):
+        self.size = size
+        self.threshold = threshold
+        self._vectors = None  # (size, dim), allocated on the first add
+        self._meta: List[Optional[tuple]] = [None] * size  # (context_key, literals, analysis)
+        self._count = 0
+        self._next = 0
+    
+    @staticmethod
+    def _unit(vector: List[float]):
+        v = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(v)
+        return v / norm if norm else v
+    
+    def lookup(self, vector: List[float], context_key: str, literals: frozenset) -> Optional[Dict[str, Any]]:
+        if not self._count:
+            return None
+        sims = self._vectors[:self._count] @ self._unit(vector)
+        candidates = np.flatnonzero(sims >= self.threshold)
+        for i in candidates[np.argsort(-sims[candidates])]:
+            entry_context, entry_literals, analysis = self._meta[i]
+            if entry_context == context_key and entry_literals == literals:
+                return analysis
+        return None
+    
+    def add(self, vector: List[float], context_key: str, literals: frozenset, analysis: Dict[str, Any]):
+        v = self._unit(vector)
+        if self._vectors is None:
+            self._vectors = np.zeros((self.size, v.shape[0]), dtype=np.float32)
+        self._vectors[self._next] = v
+        self._meta[self._next] = (context_key, literals, analysis)
+        self._next = (self._next + 1) % self.size
+        self._count = min(self._count + 1, self.size)
+    
+    def clear(self):
+        self._meta = [None] * self.size
+        self._count = self._next = 0
+
+
+class UniversalJiraAssistant:
+    """Fully dynamic Jira assistant - handles ANY query type."""
+    
+    def __init__(self, server_command: str = "python", server_args: List[str] = None):
+        if server_args is None:
+            server_args = ["jira_mcp_server.py"]
+        
+        self.server_params = StdioServerParameters(command=server_command, args=server_args)
+        self.session: Optional[ClientSession] = None
+        self.available_tools: Dict[str, Any] = {}
+        self._tools_info = ""  # Rendered once the server's tool list is known
+        self._prefix_for = None  # (day, tools_info) the cached prefix was built for
+        self._prefix = ""
+        self._prefix_key = ""
+        self._compact_prefix = ""
+        self._compact_failures = 0  # Unparseable replies to the compact prompt
+        self._tool_cache: Dict[bytes, tuple] = {}  # key -> (monotonic time, result)
+        self._tool_cache_epoch = 0  # Bumped by writes, so reads in flight don't cache stale data
+        self._analysis_cache: "OrderedDict[bytes, Dict[str, Any]]" = OrderedDict()
+        self._semantic_cache = SemanticCache() if np is not None else None
+        self.memory = ConversationMemory()
+        self.generation_config = genai.GenerationConfig(
+            temperature=0.3,
+            top_p=0.95,
+            max_output_tokens=1024,
+            # JSON mode: no prose or code fences around the analysis object.
+            # The schema stays in the prompt, as tool_args is free-form per tool.
+            response_mime_type="application/json"
+        )
+        # Replies are free text, so formatting runs warmer than analysis
+        self.format_config = genai.GenerationConfig(
+            temperature=0.7,  # More creative
+            top_p=0.95,
+            max_output_tokens=1200
+        )
+        self.model = genai.GenerativeModel(GEMINI_MODEL, generation_config=self.format_config)
+        # Same lighter model for small replies, but without the analysis config's JSON mode
+        self.light_model = genai.GenerativeModel(ANALYSIS_MODEL, generation_config=self.format_config)
+        self.analysis_model = genai.GenerativeModel(ANALYSIS_MODEL, generation_config=self.generation_config)
+        
+        # Gemini context cache for the static analysis prompt (see _get_analysis_model)
+        self._prompt_cache = None
+        self._prompt_cache_key: Optional[str] = None
+        self._prompt_cache_expires = 0.0
+        self._prompt_cache_model = None
+        self._prompt_cache_disabled = False
+        self._prompt_cache_lock = asyncio.Lock()  # One create/delete in flight at a time
+        self._flush_task: Optional[asyncio.Task] = None
+        self._prefetch_task: Optional[asyncio.Task] = None
+    
+    async def _flush_loop(self):
+        """Write new turns to disk in the background, off the reply path"""
+        while True:
+            await asyncio.sleep(MEMORY_FLUSH_INTERVAL)
+            self.memory.flush()
+    
+    async def __aenter__(self):
+        self._stdio_client = stdio_client(self.server_params)
+        self._read_write = await self._stdio_client.__aenter__()
+        self.session = await ClientSession(self._read_write[0], self._read_write[1]).__aenter__()
+        await self.session.initialize()
+        
+        tools_result = await self.session.list_tools()
+        self.available_tools = {t.name: t for t in tools_result.tools}
+        self._tools_info = self._get_comprehensive_tools_info()
+        self._flush_task = asyncio.create_task(self._flush_loop())
+        
+        # Upload the static analysis prompt now so the first query is already cached
+        await self._get_analysis_model(*self._build_analysis_prefix())
+        
+        print(f"\n{'='*70}")
+        print(f"🤖 Universal Jira Assistant - Fully Dynamic")
+        print(f"{'='*70}")
+        print(f"📊 Connected to: {JIRA_BASE}")
+        print(f"🔧 Available tools: {len(self.available_tools)}")
+        print(f"🧠 Memory: {len(self.memory.conversation_history)} conversations loaded")
+        print(f"✨ Mode: 100% LLM-driven (handles any query)")
+        print(f"{'='*70}\n")
+        
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        if self._flush_task:
+            self._flush_task.cancel()
+        if self._prefetch_task:
+            self._prefetch_task.cancel()
+        self.memory.flush()
+        await self._drop_prompt_cache()
+        if self.session:
+            await self.session.__aexit__(exc_type, exc, tb)
+        await self._stdio_client.__aexit__(exc_type, exc, tb)
+    
+    @staticmethod
+    def _tool_signature(tool) -> str:
+        """Dense call shape from the input schema, e.g. get_issue(issue_key, fields?)"""
+        schema = tool.inputSchema or {}
+        required = set(schema.get("required", ()))
+        args = ", ".join(
+            name if name in required else f"{name}?" for name in schema.get("properties", {})
+        )
+        return f"{tool.name}({args})"
+    
+    def _get_comprehensive_tools_info(self) -> str:
+        """
+        Generate tool documentation from the server's own tool list: one
+        signature line per tool with the curated hint where there is one,
+        else the first sentence of the tool's description.
+        """
+        lines = ["AVAILABLE JIRA TOOLS (arg? = optional):"]
+        for tool in self.available_tools.values():
+            desc = _TOOL_HINTS.get(tool.name)
+            if not desc:
+                desc = (tool.description or "").strip().split("\n", 1)[0].split(". ", 1)[0].rstrip(".")
+            signature = self._tool_signature(tool)
+            lines.append(f"• {signature}: {desc}" if desc else f"• {signature}")
+        
+        return "\n".join(lines)
+    
+    def _build_analysis_prefix(self) -> tuple:
+        """
+        Static part of the analysis prompt (instructions, tools and examples)
+        and its hash. Only changes with the date or the server's tool list, so
+        it is rebuilt once a day and can live in a Gemini context cache.
+        """
+        today = date.today()
+        if self._prefix_for != (today, self._tools_info):
+            self._prefix = _ANALYSIS_PROMPT_TEMPLATE.format(
+                current_date=today.isoformat(),
+                seven_days_ago=(today - timedelta(days=7)).isoformat(),
+                tools_info=self._tools_info
+            )
+            self._prefix_key = hashlib.blake2b(self._prefix.encode(), digest_size=8).hexdigest()
+            self._compact_prefix = _COMPACT_PROMPT_TEMPLATE.format(
+                current_date=today.isoformat(),
+                seven_days_ago=(today - timedelta(days=7)).isoformat(),
+                tools_info=self._tools_info
+            )
+            self._prefix_for = (today, self._tools_info)
+        return self._prefix, self._prefix_key
+    
+    async def _get_analysis_model(self, prefix: str, key: str):
+        """
+        Model bound to a CachedContent holding the prompt prefix, or None when
+        context caching is unavailable (the caller then sends the full prompt).
+        The cache is recreated when the prefix changes or its TTL runs out;
+        the SDK's cache calls block, so they run on a worker thread.
+        """
+        if self._prompt_cache_disabled or self._prompt_cache_fresh(key):
+            return self._prompt_cache_model
+        
+        async with self._prompt_cache_lock:
+            # Another task may have refreshed (or given up on) it while this one waited
+            if self._prompt_cache_disabled or self._prompt_cache_fresh(key):
+                return self._prompt_cache_model
+            return await self._create_prompt_cache(prefix, key)
+    
+    def _prompt_cache_fresh(self, key: str) -> bool:
+        return (self._prompt_cache_model is not None and key == self._prompt_cache_key
+                and time.monotonic() < self._prompt_cache_expires)
+    
+    async def _create_prompt_cache(self, prefix: str, key: str):
+        await self._delete_prompt_cache()
         try:
-            response = self.model.generate_content(analysis_prompt)
-            text = response.text.strip()
-            
-            # Extract JSON
-            if text.startswith("```"):
-                start = text.find("{")
-                end = text.rfind("}") + 1
-                if start != -1 and end > start:
-                    text = text[start:end]
+            self._prompt_cache = await asyncio.to_thread(
+                caching.CachedContent.create,
+                model=f"models/{ANALYSIS_MODEL}",
+                display_name="jira-assistant-analysis",
+                contents=[prefix],
+                ttl=PROMPT_CACHE_TTL
+            )
+        except Exception as e:
+            # e.g. prompt below the model's minimum cacheable size, or no caching on this API tier
+            print(f"⚠️ Prompt caching unavailable, sending the full prompt: {e}")
+            self._prompt_cache_disabled = True
+            return None
+        
+        self._prompt_cache_key = key
+        # Renew a minute early so a call never lands on an expired cache
+        self._prompt_cache_expires = time.monotonic() + PROMPT_CACHE_TTL.total_seconds() - 60
+        self._prompt_cache_model = genai.GenerativeModel.from_cached_content(
+            self._prompt_cache, generation_config=self.generation_config
+        )
+        return self._prompt_cache_model
+    
+    async def _drop_prompt_cache(self):
+        async with self._prompt_cache_lock:
+            await self._delete_prompt_cache()
+    
+    async def _delete_prompt_cache(self):
+        """Delete the current CachedContent; callers hold _prompt_cache_lock"""
+        cache, self._prompt_cache, self._prompt_cache_model = self._prompt_cache, None, None
+        if cache is not None:
+            try:
+                await asyncio.to_thread(cache.delete)
+            except Exception as e:
+                print(f"⚠️ Could not delete prompt cache: {e}")
+    
+    def _analysis_context_key(self, prefix_key: str) -> str:
+        """Previous user turn + prompt prefix hash (which covers the date and tool list)"""
+        history = self.memory.conversation_history
+        last_user = history[-1]["user"] if history else ""
+        return f"{last_user}|{prefix_key}"
+    
+    def _analysis_cache_key(self, user_query: str, context_key: str) -> bytes:
+        """Normalized query + its context, so follow-ups are not answered out of context"""
+        norm = _WHITESPACE_RE.sub(" ", user_query.strip().lower())
+        return hashlib.blake2b(f"{norm}|{context_key}".encode(), digest_size=16).digest()
+    
+    async def _embed_query(self, user_query: str) -> Optional[List[float]]:
+        """Query embedding for the semantic cache; disables the cache if embedding fails"""
+        try:
+            result = await genai.embed_content_async(
+                model=EMBEDDING_MODEL, content=user_query, task_type="semantic_similarity"
+            )
+            return result["embedding"]
+        except Exception as e:
+            print(f"⚠️ Semantic cache disabled: {e}")
+            self._semantic_cache = None
+            return None
+    
+    @staticmethod
+    def _comments_by_analysis(author: str, understanding: str, reasoning: str) -> Dict[str, Any]:
+        return {
+            "query_type": "jira_query",
+            "needs_jira_tools": True,
+            "understanding": understanding,
+            "response_strategy": "Use get_comments_by_author tool",
+            "tool_calls": [{
+                "tool_name": "get_comments_by_author",
+                "tool_args": {"author_query": author, "days": 30, "limit": 100},
+                "reasoning": reasoning
+            }],
+            "direct_response": None,
+            "extracted_entities": {"issues": [], "users": [author], "boards": [], "projects": []}
+        }
+    
+    def _quick_analysis(self, user_query: str) -> Optional[Dict[str, Any]]:
+        """Deterministic analysis for unambiguous queries, or None to ask the LLM"""
+        stripped = user_query.strip(_GREETING_STRIP).lower()
+        if stripped in _HELP_QUERIES:
+            return {
+                "query_type": "chat",
+                "needs_jira_tools": False,
+                "understanding": "User wants to know what I can do",
+                "response_strategy": "List capabilities",
+                "tool_calls": [],
+                "direct_response": _HELP_REPLY,
+                "extracted_entities": {"issues": [], "users": [], "boards": [], "projects": []}
+            }
+        greeting = _GREETING_REPLIES.get(stripped)
+        if greeting:
+            return {
+                "query_type": "chat",
+                "needs_jira_tools": False,
+                "understanding": "User is greeting me",
+                "response_strategy": "Respond warmly and offer help",
+                "tool_calls": [],
+                "direct_response": greeting,
+                "extracted_entities": {"issues": [], "users": [], "boards": [], "projects": []}
+            }
+        match = _COMMENTS_BY_RE.match(user_query)
+        if match:
+            author = match.group(1)
+            return self._comments_by_analysis(
+                author, f"User wants comments by {author}", "Comment search by author"
+            )
+        match = _ISSUE_LOOKUP_RE.match(user_query)
+        if match and "get_issue" in self.available_tools:
+            # After any earlier turn a bare key may answer its question ("Which
+            # issue should I graph?"); only the LLM can resolve that from context
+            if not (match["action"] or match["status"]) and self.memory.conversation_history:
+                return None
+            key = match["key"]
+            return {
+                "query_type": "jira_query",
+                "needs_jira_tools": True,
+                "understanding": f"User wants the details and status of {key}",
+                "response_strategy": "Fetch the issue",
+                "tool_calls": [{
+                    "tool_name": "get_issue",
+                    "tool_args": {"issue_key": key},
+                    "reasoning": f"Look up {key}"
+                }],
+                "direct_response": None,
+                "extracted_entities": {"issues": [key], "users": [], "boards": [], "projects": [key.split("-")[0]]}
+            }
+        return None
+    
+    async def analyze_and_respond(self, user_query: str) -> Dict[str, Any]:
+        """
+        Universal LLM analyzer - decides EVERYTHING:
+        1. Is this casual chat or Jira work?
+        2. What tools (if any) are needed?
+        3. How to respond naturally?
+        """
+        
+        # Pre-check: Common Jira patterns that should NEVER be chat
+        query_lower = user_query.lower()
+        forced_jira_query = _JIRA_PRECHECK_RE.match(user_query) is not None
+        
+        # Greetings, help, plain "comments by X" and issue lookups need no LLM round-trip
+        quick = self._quick_analysis(user_query)
+        if quick is not None:
+            return quick
+        
+        prefix, prefix_key = self._build_analysis_prefix()
+        context_key = self._analysis_context_key(prefix_key)
+        cache_key = self._analysis_cache_key(user_query, context_key)
+        cached = self._analysis_cache.get(cache_key)
+        if cached is not None:
+            self._analysis_cache.move_to_end(cache_key)
+            return cached
+        
+        # A paraphrase of an earlier query costs one embedding call, not an analysis
+        query_vector = None
+        literals = frozenset(m.lower() for m in _LITERAL_RE.findall(user_query))
+        if self._semantic_cache is not None:
+            query_vector = await self._embed_query(user_query)
+            similar = query_vector and self._semantic_cache.lookup(query_vector, context_key, literals)
+            if similar:
+                print("♻️ Reusing the analysis of a similar query")
+                return similar
+        
+        context = self.memory.get_context_for_llm()
+        tail = _ANALYSIS_TAIL_TEMPLATE.format(context=context, user_query=user_query)
+        
+        # With a cached prefix only the per-turn tail goes over the wire
+        model = await self._get_analysis_model(prefix, prefix_key)
+        use_compact = False
+        if model is None:
+            # Without a context cache the whole prompt is resent every turn. Once
+            # the conversation is going, Jira-looking queries get the rules-only
+            # prompt: the pre-check override below catches a chat misclassification.
+            # Two unparseable replies to it and the full prompt is used for good.
+            use_compact = (forced_jira_query and len(self.memory.conversation_history) >= 2
+                           and self._compact_failures < 2)
+            model, tail = self.analysis_model, f"{self._compact_prefix if use_compact else prefix}\n\n{tail}"
+        
+        try:
+            response = await model.generate_content_async(_user_content(tail))
+            text = response.text
             
-            analysis = json.loads(text)
+            try:
+                parsed = orjson.loads(text)
+            except orjson.JSONDecodeError:
+                # A reply that still wraps the object in prose or fences
+                match = _JSON_BLOCK_RE.search(text)
+                if not match:
+                    raise
+                parsed = orjson.loads(match.group(0))
+            analysis = _normalize_analysis(parsed)
             
             # Safety override: If we detected Jira keywords but LLM said "chat", correct it
             if forced_jira_query and analysis.get("query_type") == "chat":
@@ -586,33 +1328,33 @@ RESPOND WITH VALID JSON ONLY."""
                 # Force proper classification based on keywords
                 if any(kw in query_lower for kw in ['comment', 'comments']):
                     # Extract author name
-                    import re
-                    name_match = re.search(r'(?:by|from)\s+["\']?([a-zA-Z]+)["\']?', user_query, re.IGNORECASE)
+                    name_match = _AUTHOR_RE.search(user_query)
                     author = name_match.group(1) if name_match else "user"
                     
-                    analysis = {
-                        "query_type": "jira_query",
-                        "needs_jira_tools": True,
-                        "understanding": f"User wants comments by {author} - corrected from misclassification",
-                        "response_strategy": "Use get_comments_by_author tool",
-                        "tool_calls": [{
-                            "tool_name": "get_comments_by_author",
-                            "tool_args": {"author_query": author, "days": 30, "limit": 100},
-                            "reasoning": "Corrected: This is a Jira comment search"
-                        }],
-                        "direct_response": None,
-                        "extracted_entities": {"issues": [], "users": [author], "boards": [], "projects": []}
-                    }
+                    analysis = self._comments_by_analysis(
+                        author,
+                        f"User wants comments by {author} - corrected from misclassification",
+                        "Corrected: This is a Jira comment search"
+                    )
                 else:
                     # Generic correction for other Jira queries
                     analysis["query_type"] = "jira_query"
                     analysis["needs_jira_tools"] = True
                     analysis["understanding"] = "Jira data request - corrected from misclassification"
             
+            self._analysis_cache[cache_key] = analysis
+            if len(self._analysis_cache) > ANALYSIS_CACHE_SIZE:
+                self._analysis_cache.popitem(last=False)
+            # Only plans that read are shared with paraphrases; a write is never re-planned
+            read_only = all(c.get("tool_name") in READ_ONLY_TOOLS for c in analysis.get("tool_calls") or [])
+            if query_vector and self._semantic_cache is not None and read_only:
+                self._semantic_cache.add(query_vector, context_key, literals, analysis)
             return analysis
             
         except Exception as e:
             print(f"❌ Analysis failed: {e}")
+            if use_compact and isinstance(e, ValueError):  # Unparseable or not an object
+                self._compact_failures += 1
             # Return safe fallback
             return {
                 "query_type": "chat",
@@ -630,103 +1372,157 @@ RESPOND WITH VALID JSON ONLY."""
         if tool_name not in self.available_tools:
             return {"isError": True, "error": f"Unknown tool: {tool_name}"}
         
+        if tool_name not in READ_ONLY_TOOLS:
+            # A write can change anything a cached read returned
+            self._tool_cache.clear()
+            self._tool_cache_epoch += 1
+            cache_key = None
+        else:
+            cache_key = orjson.dumps([tool_name, tool_args], option=orjson.OPT_SORT_KEYS, default=str)
+            hit = self._tool_cache.get(cache_key)
+            if hit and time.monotonic() - hit[0] < TOOL_CACHE_TTL:
+                return hit[1]
+        
+        epoch = self._tool_cache_epoch
         try:
             result = await self.session.call_tool(tool_name, arguments=tool_args)
-            return result
         except Exception as e:
             return {"isError": True, "error": str(e)}
+        if cache_key and epoch == self._tool_cache_epoch and not getattr(result, "isError", False):
+            self._tool_cache[cache_key] = (time.monotonic(), result)
+        return result
+    
+    async def _prefetch_recent_issues(self):
+        """Warm the tool cache with the issues a follow-up is most likely about"""
+        keys = list(islice(self.memory.entity_cache["issues"], PREFETCH_ISSUES))
+        await asyncio.gather(
+            *(self.execute_tool("get_issue", {"issue_key": key}) for key in keys),
+            return_exceptions=True
+        )
+    
+    async def _execute_tool_calls(self, tool_calls: List[Dict[str, Any]]) -> List[Any]:
+        """
+        Run planned tool calls, results in call order. Consecutive read-only
+        calls go out together over the shared MCP session so their Jira
+        round-trips overlap; a write runs alone, after everything planned
+        before it, since later calls may depend on what it changed.
+        """
+        outcomes: List[Any] = []
+        batch: List[Dict[str, Any]] = []
+        
+        async def flush():
+            done = await asyncio.gather(
+                *(self.execute_tool(call["tool_name"], call["tool_args"]) for call in batch),
+                return_exceptions=True
+            )
+            outcomes.extend(
+                {"isError": True, "error": str(r)} if isinstance(r, BaseException) else r for r in done
+            )
+            batch.clear()
+        
+        for call in tool_calls:
+            if call["tool_name"] in READ_ONLY_TOOLS:
+                batch.append(call)
+                continue
+            if batch:
+                await flush()
+            outcomes.append(await self.execute_tool(call["tool_name"], call["tool_args"]))
+        if batch:
+            await flush()
+        return outcomes
+    
+    @staticmethod
+    def _format_locally(tool_results: List[Dict[str, Any]], analysis: Dict[str, Any]) -> Optional[str]:
+        """
+        Fill the analysis' response_template from a single list result, or
+        None when the reply needs the LLM (several tools, errors, odd shapes)
+        """
+        template = analysis.get("response_template")
+        if not (analysis.get("format_locally") and template and len(tool_results) == 1):
+            return None
+        result = tool_results[0]["result"]
+        if isinstance(result, dict) or getattr(result, "isError", False):
+            return None  # Failed call: let the LLM explain it
+        data = _result_data(result)
+        if isinstance(data, dict):
+            if data.get("error"):
+                return None
+            if set(data) == {"result"}:  # FastMCP wraps non-object returns
+                data = data["result"]
+        items = data if isinstance(data, list) else next(
+            (data[k] for k in _RESULT_LIST_KEYS if isinstance(data, dict) and isinstance(data.get(k), list)), None
+        )
+        if items is None:
+            return None
+        lines = [_item_line(item) for item in items[:LOCAL_ITEMS_SHOWN]]
+        if len(items) > LOCAL_ITEMS_SHOWN:
+            lines.append(f"…and {len(items) - LOCAL_ITEMS_SHOWN} more")
+        try:
+            return template.format_map({"count": len(items), "items": "\n".join(lines) or "(none)"})
+        except (KeyError, IndexError, ValueError):
+            return None
     
     async def format_results_naturally(self, tool_results: List[Dict[str, Any]], 
-                                       original_query: str, analysis: Dict[str, Any]) -> str:
-        """LLM creates natural, conversational response."""
+                                       original_query: str, analysis: Dict[str, Any],
+                                       on_chunk: Optional[Callable[[str], None]] = None) -> str:
+        """
+        LLM creates natural, conversational response.
+        With on_chunk, the reply is streamed and each piece is passed on as it arrives.
+        """
+        
+        # Simple list answers were already templated by the analysis step
+        local = self._format_locally(tool_results, analysis)
+        if local is not None:
+            return local
         
         results_data = []
         for r in tool_results:
-            tool_name = r["tool_name"]
-            result = r["result"]
-            
-            # Extract data
-            if hasattr(result, "structuredContent"):
-                data = result.structuredContent
-            else:
-                try:
-                    texts = [json.loads(c.text) for c in getattr(result, "content", [])]
-                    data = texts[0] if len(texts) == 1 else texts
-                except:
-                    data = str(result)[:800]
-            
             results_data.append({
-                "tool": tool_name,
-                "data": str(data)[:2000]
+                "tool": r["tool_name"],
+                "data": _bounded_dump(_result_data(r["result"]))
             })
         
-        formatting_prompt = f"""You are responding to a colleague about Jira. Be natural, friendly, and helpful.
-
-USER ASKED: "{original_query}"
-QUERY TYPE: {analysis.get('query_type', 'unknown')}
-YOUR UNDERSTANDING: {analysis.get('understanding', 'N/A')}
-
-WHAT YOU FOUND:
-{json.dumps(results_data, indent=2)}
-
-RESPOND NATURALLY:
-• Talk like a helpful colleague, not a robot
-• Use "I", "you", conversational phrases
-• Add emojis for clarity (📝🔍✅💬👤📋🎯📊⚡🐛🎉)
-• Highlight important info
-• Offer insights or next steps
-• If multiple items, prioritize and summarize
-• Ask follow-up questions when helpful
-
-EXAMPLES:
-
-For recent issues:
-"🔍 I found 8 issues active in the last week! Here's what stands out:
-
-**Needs Attention:**
-• CT-3: Login bug - In progress, looks like John's working on it
-• CT-8: Performance issue - Still waiting to be picked up
-
-**Recently Completed:**
-• CT-5: Documentation update - Closed yesterday, nice work!
-
-Want me to dive deeper into any of these?"
-
-For adding comment:
-"✅ Done! Your comment is now on CT-3. The team will see it in their notifications."
-
-For metrics:
-"📊 Here's how things look this month:
-
-**Velocity:** 23 issues completed (up from 18 last month! 🎉)
-**Current Load:** 12 in progress, 5 waiting to start
-**Focus Areas:** 3 high-priority items need attention
-
-Overall, the team's moving at a healthy pace. The completion rate is solid!"
-
-For users:
-"👥 I found 5 active team members:
-
-• John Doe - Main developer, very active
-• Jane Smith - Product lead
-• Mike Chen - Design
-
-Everyone's account is active. Who do you need to connect with?"
-
-RESPOND NOW (no JSON, just natural text):"""
+        # Compact: indentation would only spend prompt tokens
+        results_json = orjson.dumps(results_data).decode()
+        
+        formatting_prompt = _FORMAT_GUIDE + "\n" + _FORMAT_TAIL_TEMPLATE.format(
+            original_query=original_query,
+            query_type=analysis.get('query_type', 'unknown'),
+            understanding=analysis.get('understanding', 'N/A'),
+            results_json=results_json
+        )
 
+        # Several results, or a big one, are worth the stronger model
+        model = self.model if len(tool_results) > 1 or len(results_json) > LARGE_RESULT_CHARS else self.light_model
+        parts = []
         try:
-            response = self.model.generate_content(
-                formatting_prompt,
-                generation_config=genai.GenerationConfig(
-                    temperature=0.7,  # More creative
-                    top_p=0.95,
-                    max_output_tokens=1200
+            if on_chunk is None:
+                response = await model.generate_content_async(
+                    _user_content(formatting_prompt),
+                    generation_config=self.format_config
                 )
+                return response.text.strip()
+            
+            response = await model.generate_content_async(
+                _user_content(formatting_prompt),
+                generation_config=self.format_config,
+                stream=True
             )
-            return response.text.strip()
+            async for chunk in response:
+                try:
+                    text = chunk.text
+                except ValueError:  # Chunk without text parts (e.g. finish/safety only)
+                    continue
+                if not parts:
+                    text = text.lstrip()
+                if text:
+                    parts.append(text)
+                    on_chunk(text)
+            return "".join(parts).rstrip()
         except Exception as e:
-            return f"I found the information, but had trouble formatting it nicely. Here's what I got: {json.dumps(results_data, indent=2)[:500]}"
+            if parts:  # Keep what the user already saw
+                return "".join(parts).rstrip()
+            return f"I found the information, but had trouble formatting it nicely. Here's what I got: {results_json[:500]}"
     
     async def process_query(self, user_query: str):
         """Universal query processor - handles ANYTHING."""
@@ -761,20 +1557,26 @@ RESPOND NOW (no JSON, just natural text):"""
             return
         
         print(f"🔧 Executing {len(tool_calls)} tool(s)...")
-        results = []
         for call in tool_calls:
-            tool_name = call["tool_name"]
-            tool_args = call["tool_args"]
-            reasoning = call.get("reasoning", "")
-            
-            print(f"  📋 {reasoning}")
-            result = await self.execute_tool(tool_name, tool_args)
-            results.append({"tool_name": tool_name, "result": result})
+            print(f"  📋 {call.get('reasoning', '')}")
+        
+        outcomes = await self._execute_tool_calls(tool_calls)
+        results = [
+            {"tool_name": call["tool_name"], "result": result}
+            for call, result in zip(tool_calls, outcomes)
+        ]
         
         # Step 4: Natural language formatting
-        print("\n🤖 ", end="")
-        formatted_response = await self.format_results_naturally(results, user_query, analysis)
-        print(f"{formatted_response}\n")
+        print("\n🤖 ", end="", flush=True)
+        streamed = []
+        
+        def show(text: str):
+            streamed.append(text)
+            print(text, end="", flush=True)
+        
+        formatted_response = await self.format_results_naturally(results, user_query, analysis, on_chunk=show)
+        # Local templates and the fallback message come back whole
+        print("\n" if streamed else f"{formatted_response}\n")
         
         # Step 5: Update memory
         extracted = analysis.get("extracted_entities", {})
@@ -788,6 +1590,17 @@ RESPOND NOW (no JSON, just natural text):"""
             entities=extracted
         )
     
+    def _cmd_clear(self):
+        self.memory.clear()
+        self._tool_cache.clear()
+        self._analysis_cache.clear()
+        if self._semantic_cache is not None:
+            self._semantic_cache.clear()
+        print("🧹 Memory cleared! Starting fresh.\n")
+    
+    def _cmd_memory(self):
+        print(f"\n{self.memory.get_context_for_llm()}\n")
+    
     async def chat_loop(self):
         """Interactive conversation loop."""
         print("🤖 Hi! I'm your Jira assistant. I can help with:")
@@ -799,29 +1612,32 @@ RESPOND NOW (no JSON, just natural text):"""
         print("\n📝 Commands: 'memory' (view context) | 'clear' (reset) | 'quit' (exit)")
         print("="*70 + "\n")
         
+        commands = {"clear": self._cmd_clear, "memory": self._cmd_memory}
         while True:
             try:
-                query = input("💭 You: ").strip()
+                query = (await _ainput("💭 You: ")).strip()
                 
                 if not query:
                     continue
                 
-                if query.lower() in ["quit", "exit", "q", "bye"]:
+                command = query.lower()
+                if command in _QUIT_COMMANDS:
                     print("\n👋 Goodbye! Thanks for chatting. Your conversation is saved for next time!\n")
                     break
                 
-                if query.lower() == "clear":
-                    self.memory.clear()
-                    print("🧹 Memory cleared! Starting fresh.\n")
-                    continue
-                
-                if query.lower() == "memory":
-                    print(f"\n{self.memory.get_context_for_llm()}\n")
+                handler = commands.get(command)
+                if handler:
+                    handler()
                     continue
                 
                 await self.process_query(query)
                 
-            except KeyboardInterrupt:
+                # Runs while the user reads the reply and types the next query
+                idle = self._prefetch_task is None or self._prefetch_task.done()
+                if idle and self.memory.entity_cache["issues"]:
+                    self._prefetch_task = asyncio.create_task(self._prefetch_recent_issues())
+                
+            except (KeyboardInterrupt, EOFError, asyncio.CancelledError):
                 print("\n\n👋 Goodbye! Conversation saved.\n")
                 break
             except Exception as e:
@@ -838,4 +1654,10 @@ async def main():
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    try:
+        if uvloop is not None:
+            uvloop.run(main())
+        else:
+            asyncio.run(main())
+    except KeyboardInterrupt:  # asyncio.run re-raises Ctrl+C after cleanup
+        pass
\ No newline at end of file
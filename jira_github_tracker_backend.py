@@ -4,10 +4,28 @@ Add this to your existing codebase to track user stories with GitHub commits
 """
 import re
 import os
+import json
+import asyncio
+from functools import lru_cache
 from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional
 import google.generativeai as genai
 
+# ==================================================
+# Commit Message Matchers
+# ==================================================
+# Compiled once per key and reused across commits and Track clicks
+
+@lru_cache(maxsize=64)
+def _jira_key_pattern(project_key: str) -> re.Pattern:
+    """PROJECT-NUMBER pattern for a Jira project (case insensitive)"""
+    return re.compile(rf'\b({re.escape(project_key)}-\d+)\b', re.IGNORECASE)
+
+@lru_cache(maxsize=64)
+def _commit_matcher(story_key: str) -> re.Pattern:
+    """Matches commit messages that reference exactly this story key"""
+    return re.compile(rf'\b{re.escape(story_key)}\b', re.IGNORECASE)
+
 # ==================================================
 # Story Tracker Backend Class
 # ==================================================
@@ -35,8 +53,8 @@ class JiraGitHubTracker:
             try:
                 genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
                 self.model = genai.GenerativeModel("gemini-2.0-flash")
-            except:
-                pass
+            except Exception as e:
+                print(f"DEBUG: Gemini init failed, validation disabled: {e}")
     
     # ==================================================
     # Core Tracking Functions
@@ -97,12 +115,23 @@ class JiraGitHubTracker:
             return result
         return None
     
-    async def get_comments(self, issue_key: str) -> Dict[str, Any]:
+    async def get_comments(
+        self,
+        issue_key: str,
+        result: Any = None,
+        issue: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
         """
         Fetch comments for a Jira issue
+        
+        Args:
+            issue_key: Jira issue key
+            result: Raw get_issue_comments response if the caller already fetched it
+            issue: Already fetched issue, used for the fallback instead of a second get_issue
         """
         try:
-            result = await self.jira.call("get_issue_comments", {"issue_key": issue_key})
+            if result is None:
+                result = await self.jira.call("get_issue_comments", {"issue_key": issue_key})
             print(f"DEBUG: get_issue_comments raw result type: {type(result)}")
             print(f"DEBUG: get_issue_comments raw result: {repr(result)[:500]}")
             
@@ -132,7 +161,7 @@ class JiraGitHubTracker:
                         raw_comments = parsed.get("comments", [])
                     elif isinstance(parsed, list):
                         raw_comments = parsed
-                except:
+                except ValueError:
                     err_msg = f"Unexpected string result: {result[:100]}"
             
             print(f"DEBUG: Found {len(raw_comments)} raw comments from tool")
@@ -142,7 +171,8 @@ class JiraGitHubTracker:
             # If we have an error or no comments, try fallback by fetching the issue directly
             if err_msg or (not raw_comments and not isinstance(result, list)):
                 print(f"DEBUG: get_issue_comments failed (err: {err_msg}) or empty. Trying fallback via get_issue...")
-                issue = await self.get_issue_by_key(issue_key)
+                if issue is None:
+                    issue = await self.get_issue_by_key(issue_key)
                 if issue:
                     fields = issue.get("fields", {})
                     fallback_comments = fields.get("comment", {}).get("comments", [])
@@ -187,7 +217,7 @@ class JiraGitHubTracker:
                             return text
 
                         body = extract_adf_text(body).strip()
-                    except:
+                    except (AttributeError, TypeError, RecursionError):
                         body = str(body)
                 
                 comment_info = c.copy()
@@ -234,11 +264,11 @@ class JiraGitHubTracker:
         if isinstance(result, dict) and result.get("commits"):
             commits = result["commits"]
             
-            # Filter by author email
+            # Filter by author email (target lowered once, not per commit)
+            target = author_email.lower()
             author_commits = [
                 commit for commit in commits
-                if commit.get("commit", {}).get("author", {}).get("email", "").lower() 
-                   == author_email.lower()
+                if commit.get("commit", {}).get("author", {}).get("email", "").lower() == target
             ]
             
             return author_commits
@@ -266,8 +296,7 @@ class JiraGitHubTracker:
             List of found Jira keys
         """
         # Pattern: PROJECT-NUMBER (case insensitive)
-        pattern = rf'\b({project_key}-\d+)\b'
-        matches = re.findall(pattern, commit_message, re.IGNORECASE)
+        matches = _jira_key_pattern(project_key).findall(commit_message)
         
         # Convert to uppercase and remove duplicates
         return list(set([m.upper() for m in matches]))
@@ -326,15 +355,39 @@ class JiraGitHubTracker:
         story_key: str,
         repo_owner: str,
         repo_name: str,
-        branch: str = "main"
+        branch: str = "main",
+        story: Optional[Dict[str, Any]] = None,
+        comments_result: Any = None,
+        fetch_comments: bool = True
     ) -> Dict[str, Any]:
         """
         Track commits related to a specific user story with validation
+        
+        `story` and `comments_result` are the raw get_issue / get_issue_comments
+        responses when the caller has already fetched them; otherwise both are
+        requested concurrently here. With fetch_comments=False comments are
+        skipped entirely (callers that load them on demand).
         """
         print(f"DEBUG: Tracking {story_key} in {repo_owner}/{repo_name}...")
         
-        # Get story from Jira
-        story = await self.get_issue_by_key(story_key)
+        # Get story and comments from Jira (independent calls, so in parallel)
+        comm_res = {"comments": [], "error": None}
+        if story is None:
+            if fetch_comments:
+                story, comm_res = await asyncio.gather(
+                    self.get_issue_by_key(story_key),
+                    self.get_comments(story_key, comments_result)
+                )
+            else:
+                story = await self.get_issue_by_key(story_key)
+        else:
+            if not isinstance(story, dict) or story.get("error") or story.get("isError"):
+                story = None
+            if fetch_comments:
+                # Search results carry no comment field, so only a full issue can
+                # stand in for get_comments' get_issue fallback
+                fallback_issue = story if story and "comment" in story.get("fields", {}) else None
+                comm_res = await self.get_comments(story_key, comments_result, issue=fallback_issue)
         
         if not story:
             return {
@@ -362,7 +415,7 @@ class JiraGitHubTracker:
                             if c.get("type") == "text":
                                 text_parts.append(c.get("text", ""))
                 description_text = "\n".join(text_parts)
-            except:
+            except (AttributeError, TypeError):
                 description_text = str(description)
         else:
             description_text = str(description)
@@ -382,6 +435,7 @@ class JiraGitHubTracker:
             "commits": [],
             "comments": [],
             "comments_error": None,
+            "comments_fetched": fetch_comments,
             "commit_count": 0,
             "has_activity": False,
             "last_commit_date": None,
@@ -397,9 +451,7 @@ class JiraGitHubTracker:
             "email": assignee_email
         }
         
-        # Step 5: Fetch Comments (DO THIS EARLY so early returns don't block it)
-        print(f"DEBUG: Fetching comments for {story_key}...")
-        comm_res = await self.get_comments(story_key)
+        # Step 5: Attach Comments (DO THIS EARLY so early returns don't block it)
         analysis["comments"] = comm_res.get("comments", [])
         analysis["comments_error"] = comm_res.get("error")
 
@@ -420,15 +472,15 @@ class JiraGitHubTracker:
         )
         
         # Filter commits that reference this story
-        project_key = story_key.split("-")[0]
+        # (cached compiled matcher; IGNORECASE replaces per-commit .upper() copies)
+        story_re = _commit_matcher(story_key)
         related_commits = []
         
         for commit in commits:
             commit_msg = commit.get("commit", {}).get("message", "")
-            referenced_keys = self.extract_jira_keys_from_message(commit_msg, project_key)
             
             # Check if this story is referenced
-            if story_key.upper() in [k.upper() for k in referenced_keys]:
+            if story_re.search(commit_msg):
                 commit_info = {
                     "sha": commit.get("sha", "")[:7],
                     "full_sha": commit.get("sha", ""),
@@ -483,6 +535,37 @@ class JiraGitHubTracker:
         print(f"DEBUG: Finished tracking {story_key}. Work status: {analysis['work_status']}")
         return analysis
     
+    async def _track_stories_concurrently(
+        self,
+        stories: List[Dict[str, Any]],
+        repo_owner: str,
+        repo_name: str,
+        max_concurrency: int = 8
+    ) -> List[Dict[str, Any]]:
+        """
+        Run track_story_commits for many stories at once
+        
+        The per-story Jira/GitHub round-trips are independent, so they are
+        fired together and bounded by a semaphore to avoid rate-limit bursts.
+        Results keep the order of `stories`.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+        
+        async def track_one(story: Dict[str, Any]) -> Dict[str, Any]:
+            async with semaphore:
+                # The search result already has every field the analysis reads,
+                # so don't re-fetch each issue with get_issue
+                return await self.track_story_commits(
+                    story.get("key"),
+                    repo_owner,
+                    repo_name,
+                    story=story
+                )
+        
+        return await asyncio.gather(*[
+            track_one(story) for story in stories
+        ])
+    
     async def track_assignee_work(
         self,
         assignee_email: str,
@@ -504,31 +587,30 @@ class JiraGitHubTracker:
         Returns:
             Summary of assignee's work across all stories
         """
-        # Get stories assigned to this person
-        stories = await self.get_user_stories_by_project(
-            project_key,
-            assignee=assignee_email
-        )
+        async def analyze_stories():
+            # Get stories assigned to this person, then analyze each story
+            stories = await self.get_user_stories_by_project(
+                project_key,
+                assignee=assignee_email
+            )
+            return stories, await self._track_stories_concurrently(
+                stories,
+                repo_owner,
+                repo_name
+            )
         
-        # Get all commits by this person
+        # The author's overall commit listing doesn't depend on the stories,
+        # so it runs alongside the Jira search and the per-story analyses
         since = datetime.now() - timedelta(days=days_back)
-        commits = await self.get_commits_by_author(
-            repo_owner,
-            repo_name,
-            assignee_email,
-            since
-        )
-        
-        # Analyze each story
-        story_analyses = []
-        for story in stories:
-            story_key = story.get("key")
-            analysis = await self.track_story_commits(
-                story_key,
+        (stories, story_analyses), commits = await asyncio.gather(
+            analyze_stories(),
+            self.get_commits_by_author(
                 repo_owner,
-                repo_name
+                repo_name,
+                assignee_email,
+                since
             )
-            story_analyses.append(analysis)
+        )
         
         # Calculate statistics
         total_stories = len(stories)
@@ -572,15 +654,11 @@ class JiraGitHubTracker:
         stories = await self.get_user_stories_by_project(project_key)
         
         # Analyze each story
-        analyses = []
-        for story in stories:
-            story_key = story.get("key")
-            analysis = await self.track_story_commits(
-                story_key,
-                repo_owner,
-                repo_name
-            )
-            analyses.append(analysis)
+        analyses = await self._track_stories_concurrently(
+            stories,
+            repo_owner,
+            repo_name
+        )
         
         # Group by status
         by_status = {}
@@ -10,6 +10,8 @@ from __future__ import annotations
 
 import sys
 import os
+import asyncio
+import functools
 import re
 import json
 import urllib.parse
@@ -97,26 +99,36 @@ def _agile(path: str) -> str: return f"{JIRA_BASE}/rest/agile/1.0{path if path.s
 
 # ---- Tools ----
 
-@mcp.tool()
+def _tool():
+    """mcp.tool() for a blocking handler: it runs on a worker thread, so the
+    client's concurrent calls overlap instead of queueing on the event loop"""
+    def register(fn):
+        @functools.wraps(fn)
+        async def run(*args, **kwargs):
+            return await asyncio.to_thread(fn, *args, **kwargs)
+        return mcp.tool()(run)
+    return register
+
+@_tool()
 def list_projects() -> Dict[str, Any]:
     """Returns all projects"""
     resp = _get(_rest("/project"))
     if _is_error_resp(resp): return resp
     return {"projects": resp if isinstance(resp, list) else []}
 
-@mcp.tool()
+@_tool()
 def search_projects(query: Optional[str] = None, max_results: int = 50) -> Dict[str, Any]:
     """Search for projects"""
     params = {"maxResults": max_results}
     if query: params["query"] = query
     return _get(_rest("/project/search"), params)
 
-@mcp.tool()
+@_tool()
 def get_project_details(project_key: str) -> Dict[str, Any]:
     """Returns detailed info for a project including issue types"""
     return _get(_rest(f"/project/{project_key}"))
 
-@mcp.tool()
+@_tool()
 def get_issue_createmeta(project_key: str) -> Dict[str, Any]:
     """Returns create metadata for a project (issue types and fields)"""
     # Jira Cloud v3 createmeta is specialized. We'll simplify.
@@ -126,21 +138,21 @@ def get_issue_createmeta(project_key: str) -> Dict[str, Any]:
     # Return issue types list as expected by client
     return {"issueTypes": resp.get("issueTypes", [])}
 
-@mcp.tool()
+@_tool()
 def get_priorities() -> Dict[str, Any]:
     """Returns all priorities"""
     resp = _get(_rest("/priority"))
     if _is_error_resp(resp): return resp
     return {"priorities": resp if isinstance(resp, list) else []}
 
-@mcp.tool()
+@_tool()
 def list_components(project_key: str) -> Dict[str, Any]:
     """Returns all components for a project"""
     resp = _get(_rest(f"/project/{project_key}/components"))
     if _is_error_resp(resp): return resp
     return {"components": resp if isinstance(resp, list) else []}
 
-@mcp.tool()
+@_tool()
 def search_issues(jql: str, fields: Optional[List[str]] = None, expand: Optional[str] = None, max_results: int = 50) -> Dict[str, Any]:
     """Searches Jira issues with JQL. result: {"issues": [...], "total": N}"""
     params = {"jql": jql, "maxResults": max_results}
@@ -148,7 +160,7 @@ def search_issues(jql: str, fields: Optional[List[str]] = None, expand: Optional
     if expand: params["expand"] = expand
     return _get(_rest("/search/jql"), params)
 
-@mcp.tool()
+@_tool()
 def get_issue(issue_key: str, fields: Optional[List[str]] = None, expand: Optional[str] = None) -> Dict[str, Any]:
     """Fetches a single issue by key"""
     params = {}
@@ -156,7 +168,7 @@ def get_issue(issue_key: str, fields: Optional[List[str]] = None, expand: Option
     if expand: params["expand"] = expand
     return _get(_rest(f"/issue/{issue_key}"), params)
 
-@mcp.tool()
+@_tool()
 def get_issue_comments(issue_key: str) -> Dict[str, Any]:
     """Fetches all comments for an issue. result: {"comments": [...]}"""
     _log_info(f"Fetching comments for {issue_key}...")
@@ -174,7 +186,7 @@ def get_issue_comments(issue_key: str) -> Dict[str, Any]:
         } for c in comments]
     }
 
-@mcp.tool()
+@_tool()
 def create_issue(project_key: str, summary: str, description: Union[str, Dict[str, Any]] = "", issue_type: str = "Task", assignee_account_id: Optional[str] = None, fields_extra: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
     """Creates a new Jira issue with support for extra fields and ADF descriptions."""
     # Determine if issue_type is ID (numeric string) or Name
@@ -204,18 +216,18 @@ def create_issue(project_key: str, summary: str, description: Union[str, Dict[st
             
     return _post(_rest("/issue"), payload)
 
-@mcp.tool()
+@_tool()
 def add_comment(issue_key: str, body: str) -> Dict[str, Any]:
     """Adds a comment to an issue"""
     payload = {"body": {"version": 1, "type": "doc", "content": [{"type": "paragraph", "content": [{"type": "text", "text": body}]}]}}
     return _post(_rest(f"/issue/{issue_key}/comment"), payload)
 
-@mcp.tool()
+@_tool()
 def get_myself() -> Dict[str, Any]:
     """Returns the currently authenticated user details"""
     return _get(_rest("/myself"))
 
-@mcp.tool()
+@_tool()
 def get_users(query: Optional[str] = None, max_results: int = 50) -> Dict[str, Any]:
     """Searches for users. result: {"users": [...]}"""
     resp = _get(_rest("/users/search"), params={"query": query or "", "maxResults": max_results})
@@ -223,29 +235,29 @@ def get_users(query: Optional[str] = None, max_results: int = 50) -> Dict[str, A
     users = resp if isinstance(resp, list) else []
     return {"users": [{"accountId": u.get("accountId"), "displayName": u.get("displayName"), "active": u.get("active")} for u in users]}
 
-@mcp.tool()
+@_tool()
 def list_boards(project_key_or_id: Optional[str] = None) -> Dict[str, Any]:
     """Returns all boards, optionally filtered by project"""
     params = {}
     if project_key_or_id: params["projectKeyOrId"] = project_key_or_id
     return _get(_agile("/board"), params)
 
-@mcp.tool()
+@_tool()
 def get_board_configuration(board_id: int) -> Dict[str, Any]:
     """Returns configuration for a specific board"""
     return _get(_agile(f"/board/{board_id}/configuration"))
 
-@mcp.tool()
+@_tool()
 def get_filter(filter_id: str) -> Dict[str, Any]:
     """Returns details for a specific filter"""
     return _get(_rest(f"/filter/{filter_id}"))
 
-@mcp.tool()
+@_tool()
 def get_project_statuses(project_key: str) -> Any:
     """Returns all statuses for a project"""
     return _get(_rest(f"/project/{project_key}/statuses"))
 
-@mcp.tool()
+@_tool()
 def list_board_backlog(board_id: int, start_at: int = 0, max_results: int = 50, jql: str = None) -> Dict[str, Any]:
     """Returns issues in the backlog for a board"""
     params = {"startAt": start_at, "maxResults": max_results}
@@ -253,7 +265,7 @@ def list_board_backlog(board_id: int, start_at: int = 0, max_results: int = 50,
         params["jql"] = jql
     return _get(_agile(f"/board/{board_id}/backlog"), params=params)
 
-@mcp.tool()
+@_tool()
 def list_board_issues(board_id: int, start_at: int = 0, max_results: int = 50, jql: str = None) -> Dict[str, Any]:
     """Returns all issues on the board (backlog + active)"""
     params = {"startAt": start_at, "maxResults": max_results}
@@ -261,22 +273,22 @@ def list_board_issues(board_id: int, start_at: int = 0, max_results: int = 50, j
         params["jql"] = jql
     return _get(_agile(f"/board/{board_id}/issue"), params=params)
 
-@mcp.tool()
+@_tool()
 def move_to_board(board_id: int, issues: List[str]) -> Dict[str, Any]:
     """Moves issues to the board from the backlog"""
     return _post(_agile(f"/board/{board_id}/issue"), {"issues": issues})
 
-@mcp.tool()
+@_tool()
 def move_to_backlog(issues: List[str]) -> Dict[str, Any]:
     """Moves issues to the backlog"""
     return _post(_agile("/backlog/issue"), {"issues": issues})
 
-@mcp.tool()
+@_tool()
 def get_issue_transitions(issue_key: str) -> Dict[str, Any]:
     """Returns possible transitions for an issue"""
     return _get(_rest(f"/issue/{issue_key}/transitions"))
 
-@mcp.tool()
+@_tool()
 def list_epics(project_key: str) -> Dict[str, Any]:
     """Returns all issues that might be epics for a project (broad JQL)"""
     # Simply find anything that is an Epic by type name using the robust endpoint.
@@ -285,7 +297,7 @@ def list_epics(project_key: str) -> Dict[str, Any]:
     params = {"jql": jql, "maxResults": 1000, "fields": "summary,status,issuetype,parent"}
     return _get(_rest("/search/jql"), params)
 
-@mcp.tool()
+@_tool()
 def create_epic(project_key: str, summary: str, description: str = "") -> Dict[str, Any]:
     """Creates a new Epic in Jira"""
     # Note: Modern Jira uses 'Epic Name' field for some templates, 
@@ -307,19 +319,19 @@ def create_epic(project_key: str, summary: str, description: str = "") -> Dict[s
     
     return _post(_rest("/issue"), payload)
 
-@mcp.tool()
+@_tool()
 def list_board_issues(board_id: int, start_at: int = 0, max_results: int = 50) -> Dict[str, Any]:
     """Returns issues for a board"""
     return _get(_agile(f"/board/{board_id}/issue"), params={"startAt": start_at, "maxResults": max_results})
 
-@mcp.tool()
+@_tool()
 def list_sprints(board_id: int, state: Optional[str] = None) -> Dict[str, Any]:
     """Returns sprints for a board. State can be 'future', 'active', 'closed'."""
     params = {}
     if state: params["state"] = state
     return _get(_agile(f"/board/{board_id}/sprint"), params=params)
 
-@mcp.tool()
+@_tool()
 def add_to_sprint(sprint_id: int, issues: List[str]) -> Dict[str, Any]:
     """Adds issues to a sprint"""
     return _post(_agile(f"/sprint/{sprint_id}/issue"), {"issues": issues})
@@ -2,7 +2,10 @@ import os
 import json
 import re
 import asyncio
+import io
 import threading
+import hashlib
+import orjson
 import streamlit as st
 from dotenv import load_dotenv
 from mcp import ClientSession
@@ -12,7 +15,8 @@ import docx
 import google.generativeai as genai
 from typing import Any, List, Dict, Optional
 import intigration  # Import the integration module
-import requests  # For GitHub API calls
+import aiohttp  # For GitHub API calls
+from http_cache import ResponseCache, max_age
 
 # ==================================================
 # Setup
@@ -27,6 +31,14 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+# Dropdowns larger than this are filtered first to keep reruns light
+MAX_EPIC_OPTIONS = 50
+
+def _epic_key_num(key: str) -> int:
+    """Numeric part of an issue key, for newest-first epic ordering (KAN-116 > KAN-114)"""
+    try: return int(key.split('-')[1])
+    except (IndexError, ValueError): return 0
+
 # ==================================================
 # Async Event Loop for Streamlit
 # ==================================================
@@ -81,13 +93,22 @@ class JiraClient:
         self._session_ready = asyncio.Event()
         
         # Start the background task on the current loop (which is the persistent one)
-        asyncio.create_task(self._run_session())
+        session_task = asyncio.create_task(self._run_session())
+        ready_task = asyncio.create_task(self._session_ready.wait())
         
         try:
-            await asyncio.wait_for(self._session_ready.wait(), timeout=15)
-            return True
-        except asyncio.TimeoutError:
-            print("Connection timed out")
+            # Return as soon as the session is ready OR the server task dies,
+            # instead of always sitting out the full timeout on a failed launch
+            done, _ = await asyncio.wait(
+                {ready_task, session_task}, timeout=15, return_when=asyncio.FIRST_COMPLETED
+            )
+            if ready_task in done:
+                return True
+            ready_task.cancel()
+            if session_task in done:
+                print("Connection failed: Jira server exited before the session was ready")
+            else:
+                print("Connection timed out")
             return False
         except Exception as e:
             print(f"Connection failed: {e}")
@@ -112,8 +133,8 @@ class JiraClient:
         # Handle various response formats
         if hasattr(res, "content") and res.content:
             try:
-                return json.loads(res.content[0].text)
-            except:
+                return orjson.loads(res.content[0].text)
+            except orjson.JSONDecodeError:
                 return res.content[0].text
         
         # New handling for empty content (implies successful void return or empty list?)
@@ -134,12 +155,68 @@ async def connect_jira():
 class GitHubClient:
     """Simple GitHub REST API client for fetching commits"""
     
-    def __init__(self, token=None):
+    # Seconds a cached GET stays fresh, per endpoint; after that it is
+    # revalidated with If-None-Match / If-Modified-Since
+    USER_TTL = 24 * 3600
+    REPOS_TTL = 3600
+    COMMITS_TTL = 60
+    
+    def __init__(self, token=None, cache=None):
         self.token = token or os.getenv("GITHUB_TOKEN")
         self.headers = {
             "Accept": "application/vnd.github.v3+json",
             "Authorization": f"token {self.token}" if self.token else ""
         }
+        # Namespaces cache entries so different tokens never share responses
+        self.fingerprint = hashlib.blake2b((self.token or "").encode(), digest_size=8).hexdigest()
+        self.cache = cache or ResponseCache()
+        self._http = None  # aiohttp session, created lazily on the persistent loop
+    
+    async def _session(self) -> aiohttp.ClientSession:
+        """Keep-alive session shared by every call; must be created inside the running loop"""
+        if self._http is None or self._http.closed:
+            self._http = aiohttp.ClientSession(
+                headers=self.headers,
+                timeout=aiohttp.ClientTimeout(total=10),
+                connector=aiohttp.TCPConnector(limit=20, keepalive_timeout=60)
+            )
+        return self._http
+    
+    async def _get_json(self, url: str, params: dict = None, expire_after: int = None):
+        """
+        GET a JSON payload, served from the on-disk cache while fresh.
+        Stale entries are revalidated with their ETag / Last-Modified; on 304
+        the cached body is reused. Without a per-endpoint TTL the response's
+        Cache-Control max-age decides freshness.
+        """
+        key = self.cache.make_key("GET", url, params, namespace=self.fingerprint)
+        entry = self.cache.get_entry(key)
+        if entry and entry["fresh"]:
+            return entry["body"]
+        
+        headers = {}
+        if entry and entry["etag"]:
+            headers["If-None-Match"] = entry["etag"]
+        if entry and entry["last_modified"]:
+            headers["If-Modified-Since"] = entry["last_modified"]
+        
+        session = await self._session()
+        async with session.get(url, params=params, headers=headers) as response:
+            ttl = expire_after if expire_after is not None else max_age(response.headers.get("Cache-Control"))
+            if response.status == 304 and entry:
+                self.cache.touch(key, ttl)
+                return entry["body"]
+            response.raise_for_status()
+            data = await response.json()
+            self.cache.set(
+                key, data, ttl,
+                etag=response.headers.get("ETag"),
+                last_modified=response.headers.get("Last-Modified")
+            )
+        return data
+    
+    def clear_cache(self):
+        self.cache.clear()
     
     async def call(self, tool: str, args: dict):
         """MCP-like call interface for compatibility"""
@@ -153,32 +230,43 @@ class GitHubClient:
         elif tool == "get_authenticated_user":
             return await self.get_authenticated_user()
         elif tool == "list_repositories":
-            return await self.list_repositories()
+            return await self.list_repositories(
+                page=args.get("page", 1),
+                per_page=args.get("per_page", 100)
+            )
         return {"error": f"Unknown tool: {tool}"}
 
     async def get_authenticated_user(self):
         """Get the current authenticated GitHub user"""
         url = "https://api.github.com/user"
         try:
-            response = requests.get(url, headers=self.headers, timeout=10)
-            response.raise_for_status()
-            data = response.json()
+            data = await self._get_json(url, expire_after=self.USER_TTL)
             return {"username": data.get("login"), "name": data.get("name")}
         except Exception as e:
             return {"error": str(e)}
 
-    async def list_repositories(self):
-        """List repositories for the authenticated user"""
+    async def list_repositories(self, page: int = 1, per_page: int = 100):
+        """List one page of repositories for the authenticated user"""
         url = "https://api.github.com/user/repos"
-        params = {"sort": "updated", "per_page": 100}
+        params = {"sort": "updated", "per_page": per_page, "page": page}
         try:
-            response = requests.get(url, headers=self.headers, params=params, timeout=10)
-            response.raise_for_status()
-            repos = response.json()
+            repos = await self._get_json(url, params, expire_after=self.REPOS_TTL)
             return {"repositories": [{"name": r["name"], "full_name": r["full_name"]} for r in repos]}
         except Exception as e:
             return {"error": str(e)}
 
+    async def iter_repositories(self, per_page: int = 100, max_pages: int = 10):
+        """Yield repositories page by page (most recently updated first), stopping at the first short page"""
+        for page in range(1, max_pages + 1):
+            payload = await self.list_repositories(page=page, per_page=per_page)
+            if payload.get("error"):
+                raise RuntimeError(payload["error"])
+            repos = payload["repositories"]
+            if repos:
+                yield repos
+            if len(repos) < per_page:
+                return
+
     async def get_commits(self, owner: str, repo: str, since: str = None):
         """Fetch commits from a GitHub repository"""
         if not owner or not repo:
@@ -190,9 +278,7 @@ class GitHubClient:
             params["since"] = since
         
         try:
-            response = requests.get(url, headers=self.headers, params=params, timeout=10)
-            response.raise_for_status()
-            return response.json()
+            return await self._get_json(url, params, expire_after=self.COMMITS_TTL)
         except Exception as e:
             print(f"GitHub API Error: {e}")
             return []
@@ -201,23 +287,28 @@ class GitHubClient:
 # PRD Text Extraction
 # ==================================================
 def extract_input_data(file):
-    name = file.name.lower()
+    # Every widget interaction reruns the script; parse each upload only once
+    return _extract_input_bytes(file.name, file.getvalue())
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def _extract_input_bytes(file_name: str, data: bytes):
+    name = file_name.lower()
     if name.endswith(".pdf"):
-        reader = PdfReader(file)
+        reader = PdfReader(io.BytesIO(data))
         return "\n".join(p.extract_text() or "" for p in reader.pages)
     elif name.endswith(".docx"):
-        d = docx.Document(file)
+        d = docx.Document(io.BytesIO(data))
         return "\n".join(p.text for p in d.paragraphs)
     elif name.endswith((".png", ".jpg", ".jpeg")):
-        return {"type": "image", "mime_type": f"image/{name.split('.')[-1]}", "data": file.read()}
+        return {"type": "image", "mime_type": f"image/{name.split('.')[-1]}", "data": data}
     elif name.endswith((".srt", ".vtt")):
-        content = file.read().decode("utf-8")
+        content = data.decode("utf-8")
         # Remove timestamps/indices for cleaner prompt
         content = re.sub(r'\d+\n\d{2}:\d{2}:\d{2},\d{3} --> \d{2}:\d{2}:\d{2},\d{3}', '', content)
         content = re.sub(r'(\d{2}:)?\d{2}:\d{2}.\d{3} --> (\d{2}:)?\d{2}:\d{2}.\d{3}', '', content)
         content = re.sub(r'\n\s*\n', '\n', content)
         return f"[Video Transcript]\n{content.strip()}"
-    return file.read().decode("utf-8")
+    return data.decode("utf-8")
 
 # ==================================================
 # Gemini AI User Story Generation
@@ -1005,13 +1096,10 @@ Acceptance Criteria (High level):
                                                     all_epics[ikey] = i.get("fields", {}).get("summary", "No Summary from Hierarchy")
                                     except: pass
 
-                                    # Convert back to list and sort by numerical key descending
-                                    def key_num(k):
-                                        try: return int(k.split('-')[1])
-                                        except: return 0
-
+                                    # Convert back to list and sort by numerical key descending.
+                                    # Sorted once here; the dropdown relies on this order every rerun
                                     sorted_list = [{"key": k, "summary": v} for k, v in all_epics.items()]
-                                    sorted_list.sort(key=lambda x: key_num(x["key"]), reverse=True)
+                                    sorted_list.sort(key=lambda x: _epic_key_num(x["key"]), reverse=True)
 
                                     st.session_state.epics = sorted_list
                                     st.session_state.epics_processed = True
@@ -1061,16 +1149,21 @@ Acceptance Criteria (High level):
 
                 if epic_choice == "1. Select Existing Epic":
                     if st.session_state.epics:
-                        # Numerical sort (KAN-116, KAN-114...)
-                        def key_num(k):
-                            try: return int(k.split('-')[1])
-                            except: return 0
+                        # Already kept newest-first (KAN-116, KAN-114...) when written
+                        sorted_epics = st.session_state.epics
                         
-                        sorted_epics = sorted(st.session_state.epics, key=lambda x: key_num(x['key']), reverse=True)
-                        epic_display_map = {f"{e['key']}: {e['summary']}": e['key'] for e in sorted_epics}
+                        # Search-first: only the top matches go into the dropdown
+                        epic_filter = st.text_input("Filter epics", "", key="epic_filter", placeholder="Key or summary").strip().lower()
+                        matching_epics = [e for e in sorted_epics if not epic_filter or epic_filter in f"{e['key']}: {e['summary']}".lower()]
+                        if len(matching_epics) > MAX_EPIC_OPTIONS:
+                            st.caption(f"Showing {MAX_EPIC_OPTIONS}/{len(matching_epics)} epics, refine the filter to see more.")
+                        epic_display_map = {f"{e['key']}: {e['summary']}": e['key'] for e in matching_epics[:MAX_EPIC_OPTIONS]}
                         
-                        epic_selection = st.selectbox("Select Epic", list(epic_display_map.keys()))
-                        selected_epic_key = epic_display_map.get(epic_selection)
+                        if epic_display_map:
+                            epic_selection = st.selectbox("Select Epic", list(epic_display_map.keys()))
+                            selected_epic_key = epic_display_map.get(epic_selection)
+                        else:
+                            st.info("No epics match the filter.")
                     else:
                         st.warning("⚠️ No existing epics found for this project.")
                         if st.button("🔄 Force Re-fetch Epics"):
@@ -1170,15 +1263,17 @@ Acceptance Criteria (High level):
         # 3️⃣ Select stories (Updated Position)
         if st.session_state.stories:
             st.header("3️⃣ Generated User Stories")
-            selected = []
-            for idx, s in enumerate(st.session_state.stories):
-                story_id = f"story_{idx}"
-                with st.container():
-                    col1, col2 = st.columns([0.05,0.95])
-                    with col1:
-                        checked = st.checkbox("Select", key=story_id, label_visibility="collapsed")
-                    with col2:
-                        st.markdown(f"""
+            # Checkboxes live in a form: ticking them no longer reruns the whole page,
+            # the selection is applied in one rerun when the form is submitted
+            with st.form("story_selection"):
+                for idx, s in enumerate(st.session_state.stories):
+                    story_id = f"story_{idx}"
+                    with st.container():
+                        col1, col2 = st.columns([0.05,0.95])
+                        with col1:
+                            st.checkbox("Select", key=story_id, label_visibility="collapsed")
+                        with col2:
+                            st.markdown(f"""
     <div class='story-box'>
     <b>{s.get('title','Untitled')}</b><br><br>
     {s.get('description','')}<br><br>
@@ -1189,9 +1284,11 @@ Acceptance Criteria (High level):
     <b>Priority:</b> {s.get('priority','Medium')}
     </div>
     """, unsafe_allow_html=True)
-                    if checked:
-                        selected.append(s)
-                        st.session_state.selected = selected
+                if st.form_submit_button("✅ Use Selected Stories"):
+                    st.session_state.selected = [
+                        s for idx, s in enumerate(st.session_state.stories)
+                        if st.session_state.get(f"story_{idx}", False)
+                    ]
 
 
 
@@ -1247,7 +1344,8 @@ Acceptance Criteria (High level):
                                 # Add to session state so it appears in dropdown immediately
                                 if "epics" not in st.session_state or st.session_state.epics is None:
                                     st.session_state.epics = []
-                                st.session_state.epics.append({"key": parent_epic_key, "summary": new_epic_name})
+                                # A new epic has the project's highest key, so it goes first
+                                st.session_state.epics.insert(0, {"key": parent_epic_key, "summary": new_epic_name})
                             else:
                                 st.error(f"Failed to create Epic: {epic_res}")
                                 st.stop()